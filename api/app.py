@@ -1,12 +1,22 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import (
+    Flask,
+    Response,
+    request,
+    jsonify,
+    send_file,
+    send_from_directory,
+    stream_with_context,
+)
 from flask_cors import CORS
-from typing import List
+from typing import List, Optional
+import json
 import os
-from io import BytesIO
+import tempfile
 
 from models import Collection
-from services.shuffle_manager import ShuffleManager
+from services.shuffle_manager import INCLUSION_TIMEOUT, ShuffleManager
 from services.moxfield_connector import MoxfieldConnector
+from services.find_commanders import iter_commander_analysis
 
 app = Flask(
     __name__, static_folder="../frontend/dist/frontend/browser", static_url_path=""
@@ -45,53 +55,97 @@ def get_deck_name():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/reshuffle", methods=["POST"])
-def reshuffle():
+def _validate_reshuffle_request(
+    data, mode: str, max_moves: Optional[str] = None
+) -> Optional[str]:
     """
-    Perform reshuffle operation
-    Expected JSON: [{"name": "...", "url": "...", "is_source": true/false}, ...]
+    Validate the collections and allocation options shared by the reshuffle
+    endpoints, before any collection is fetched
+    :param data: parsed JSON body
+    :param mode: requested allocation mode
+    :param max_moves: raw max_moves query param, if given
+    :return: error message, or None if the request is valid
     """
-    try:
-        data = request.get_json()
+    if not data or not isinstance(data, list):
+        return "Invalid input format. Expected array of collections"
+
+    if len(data) == 0:
+        return "No collections provided"
+
+    # Validate all URLs are from Moxfield
+    for collection in data:
+        if "moxfield" not in collection.get("url", "").lower():
+            return "All URLs must be from Moxfield"
 
-        if not data or not isinstance(data, list):
-            return (
-                jsonify(
-                    {"error": "Invalid input format. Expected array of collections"}
-                ),
-                400,
-            )
+    # Filter active collections for validation
+    active_data = [c for c in data if c.get("active", True)]
 
-        if len(data) == 0:
-            return jsonify({"error": "No collections provided"}), 400
+    # Check for at least one source and one target among active collections
+    has_source = any(c.get("is_source") for c in active_data)
+    has_target = any(not c.get("is_source") for c in active_data)
 
-        # Validate all URLs are from Moxfield
-        for collection in data:
-            if "moxfield" not in collection.get("url", "").lower():
-                return jsonify({"error": "All URLs must be from Moxfield"}), 400
+    if not has_source:
+        return "At least one collection must be a source"
+    if not has_target:
+        return "At least one collection must be a target"
 
-        # Filter active collections for validation
-        active_data = [c for c in data if c.get("active", True)]
+    if mode not in ("greedy", "matrix", "flow"):
+        return "mode must be 'greedy', 'matrix' or 'flow'"
 
-        # Check for at least one source and one target among active collections
-        has_source = any(c.get("is_source") for c in active_data)
-        has_target = any(not c.get("is_source") for c in active_data)
+    if max_moves is not None:
+        if mode != "flow":
+            return "max_moves is only supported with mode=flow"
+        try:
+            if int(max_moves) < 1:
+                return "max_moves must be at least 1"
+        except ValueError:
+            return "max_moves must be an integer"
+    return None
 
-        if not has_source:
-            return jsonify({"error": "At least one collection must be a source"}), 400
-        if not has_target:
-            return jsonify({"error": "At least one collection must be a target"}), 400
+
+@app.route("/api/reshuffle", methods=["POST"])
+def reshuffle():
+    """
+    Perform reshuffle operation
+    Expected JSON: [{"name": "...", "url": "...", "is_source": true/false}, ...]
+    Optional query params: mode=greedy|matrix|flow, max_moves=<int> (flow only),
+    aggregate=true for one row per (card, source, target) with a quantity,
+    inclusion=true for an EDHREC inclusion column (inclusion_timeout=<seconds>
+    caps the lookups; cards not resolved in time are left blank)
+    """
+    try:
+        data = request.get_json()
+        mode = request.args.get("mode", "greedy")
+        error = _validate_reshuffle_request(data, mode, request.args.get("max_moves"))
+        if error:
+            return jsonify({"error": error}), 400
+        max_moves = request.args.get("max_moves", type=int)
 
         # Convert to Collection objects
         collections = [Collection(**collection) for collection in data]
+        aggregate = request.args.get("aggregate", "false").lower() == "true"
+        inclusion = request.args.get("inclusion", "false").lower() == "true"
+        inclusion_timeout = request.args.get(
+            "inclusion_timeout", INCLUSION_TIMEOUT, type=float
+        )
 
         # Run the shuffle manager
         manager = ShuffleManager(collections)
-        excel_file = manager.reshuffle()
+        manager.allocate(mode=mode, max_moves=max_moves)
+
+        # Write to a temp file on disk and stream it back in chunks
+        excel_file = tempfile.TemporaryFile()
+        manager.write_excel_file(
+            excel_file,
+            aggregate=aggregate,
+            inclusion=inclusion,
+            inclusion_timeout=inclusion_timeout,
+        )
+        excel_file.seek(0)
 
         # Return the Excel file
         return send_file(
-            BytesIO(excel_file),
+            excel_file,
             mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             as_attachment=True,
             download_name="reshuffled.xlsx",
@@ -100,6 +154,93 @@ def reshuffle():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/reshuffle/plan", methods=["POST"])
+def reshuffle_plan():
+    """
+    Run the allocation and return it as JSON instead of a spreadsheet
+    Expected JSON: same as /api/reshuffle
+    Optional query params: mode, max_moves (as /api/reshuffle), summary=true to
+    return only the per-collection totals
+    """
+    try:
+        data = request.get_json()
+        mode = request.args.get("mode", "greedy")
+        error = _validate_reshuffle_request(data, mode, request.args.get("max_moves"))
+        if error:
+            return jsonify({"error": error}), 400
+        max_moves = request.args.get("max_moves", type=int)
+
+        # Convert to Collection objects
+        collections = [Collection(**collection) for collection in data]
+        summary_only = request.args.get("summary", "false").lower() == "true"
+
+        manager = ShuffleManager(collections)
+        movements = manager.allocate(mode=mode, max_moves=max_moves)
+
+        result = {
+            "moved": manager.allocated_count,
+            "collections": manager.summarize(),
+        }
+        if not summary_only:
+            result["movements"] = [
+                {
+                    "source": movement.source.id,
+                    "target": movement.target.id,
+                    "intersection": movement.intersection,
+                    "cards": movement.card_counts,
+                }
+                for movement in movements
+            ]
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _stream_event(event: str, data: dict, stream_format: str) -> str:
+    """One event as an NDJSON line or a server-sent event"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return json.dumps({"event": event, "data": data}) + "\n"
+
+
+@app.route("/api/commanders/analyze", methods=["POST"])
+def analyze_commanders():
+    """
+    Stream how complete each legendary creature's EDHREC average deck is
+    with the cards of the given binders
+    Expected JSON: {"binder_ids": ["...", ...]}
+    Optional query param: format=ndjson (default) or format=sse
+    Events: "start", one "result" per commander as soon as its deck is
+    fetched, then a "summary" sorted by completion (or "error")
+    """
+    data = request.get_json(silent=True) or {}
+    binder_ids = data.get("binder_ids")
+    if not binder_ids or not isinstance(binder_ids, list):
+        return jsonify({"error": "binder_ids must be a non-empty array"}), 400
+
+    stream_format = request.args.get("format", "ndjson")
+    if stream_format not in ("ndjson", "sse"):
+        return jsonify({"error": "format must be 'ndjson' or 'sse'"}), 400
+
+    def generate():
+        # The server only resumes this generator once the previous event is
+        # written, and the analysis only starts new fetches when resumed, so
+        # a slow client holds back the EDHREC fetches
+        try:
+            for event, payload in iter_commander_analysis(binder_ids):
+                yield _stream_event(event, payload, stream_format)
+        except Exception as e:
+            yield _stream_event("error", {"error": str(e)}, stream_format)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=(
+            "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+        ),
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_angular(path):
@@ -0,0 +1,116 @@
+"""
+Benchmark for AsyncMoxfieldConnector against the local stub server.
+
+Writes synthetic recordings in the Moxfield payload shape, serves them with a
+fixed per-request latency and times fetching hundreds of decks with a growing
+number of requests in flight.
+
+Run from the api directory:
+    python benchmarks/async_fetch_benchmark.py
+"""
+
+import asyncio
+import json
+import random
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from moxfield_stub_server import create_app
+from reshuffle_benchmark import _card_payload
+from services.async_moxfield_connector import AsyncMoxfieldConnector
+from services.moxfield_connector import FetchRequest
+
+
+def write_recordings(
+    recordings: Path, num_decks: int, deck_size: int = 100, seed: int = 0
+) -> list[str]:
+    """Deck payloads with `deck_size` mainboard cards; returns their ids"""
+    rng = random.Random(seed)
+    (recordings / "decks").mkdir(parents=True, exist_ok=True)
+
+    deck_ids = []
+    for deck_index in range(num_decks):
+        deck_id = f"deck-{deck_index}"
+        cards = {
+            f"card-{i}": _card_payload(i, 1)
+            for i in rng.sample(range(deck_size * 20), deck_size)
+        }
+        payload = {
+            "name": f"Deck {deck_index}",
+            "boards": {
+                "mainboard": {"cards": cards},
+                "commanders": {"cards": {}},
+                "companions": {"cards": {}},
+                "sideboard": {"cards": {}},
+            },
+        }
+        (recordings / "decks" / f"{deck_id}.json").write_text(json.dumps(payload))
+        deck_ids.append(deck_id)
+    return deck_ids
+
+
+async def _fetch_batched(
+    connector: AsyncMoxfieldConnector, deck_ids: list[str], in_flight: int
+):
+    requests = [FetchRequest(id=deck_id) for deck_id in deck_ids]
+    for start in range(0, len(requests), in_flight):
+        await connector.fetch_many(requests[start : start + in_flight])
+
+
+async def run_benchmark(
+    num_decks: int = 400, latency: float = 0.2, in_flight: list[int] = None
+) -> list[dict]:
+    in_flight = in_flight or [1, 10, 100, 400]
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        deck_ids = write_recordings(Path(directory), num_decks)
+
+        runner = web.AppRunner(create_app(Path(directory), latency))
+        await runner.setup()
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        site = web.TCPSite(runner, "127.0.0.1", port)
+        await site.start()
+
+        try:
+            async with AsyncMoxfieldConnector(
+                base_url=f"http://127.0.0.1:{port}"
+            ) as connector:
+                for batch in in_flight:
+                    # Sequential runs fetch a slice so the table stays fast
+                    ids = deck_ids if batch > 1 else deck_ids[:20]
+                    start = time.perf_counter()
+                    await _fetch_batched(connector, ids, batch)
+                    elapsed = time.perf_counter() - start
+                    results.append(
+                        {
+                            "in_flight": batch,
+                            "decks": len(ids),
+                            "seconds": elapsed,
+                            "decks_per_second": len(ids) / elapsed,
+                        }
+                    )
+        finally:
+            await runner.cleanup()
+    return results
+
+
+if __name__ == "__main__":
+    print("Fetching decks from the stub server at 200 ms per request")
+    print(f"{'In flight':>10}{'Decks':>8}{'Seconds':>10}{'Decks/s':>10}")
+    print("-" * 38)
+    for result in asyncio.run(run_benchmark()):
+        print(
+            f"{result['in_flight']:>10,}"
+            f"{result['decks']:>8,}"
+            f"{result['seconds']:>10.4f}"
+            f"{result['decks_per_second']:>10.1f}"
+        )
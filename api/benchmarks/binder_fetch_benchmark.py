@@ -0,0 +1,93 @@
+"""
+Benchmark for MoxfieldConnector.get_binder_content on large binders.
+
+Serves a synthetic 8,000-card binder from the local stub server and fetches it
+page by page at 100 cards per page (the previous behaviour), with the pages
+fanned out concurrently, and with the adaptive page size on top.
+
+Run from the api directory:
+    python benchmarks/binder_fetch_benchmark.py
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import services.moxfield_connector as moxfield_connector
+from reshuffle_benchmark import _card_payload
+from scraper_pool_benchmark import _serve_in_background
+from services.moxfield_connector import MoxfieldConnector
+
+
+def write_binder(recordings: Path, binder_id: str, num_cards: int):
+    """Binder recording in 100-card pages, as the search endpoint returns it"""
+    cards = [_card_payload(i, 1) for i in range(num_cards)]
+    pages = [
+        {
+            "tradeBinder": {"name": binder_id},
+            "totalPages": -(-num_cards // 100),
+            "data": cards[start : start + 100],
+        }
+        for start in range(0, num_cards, 100)
+    ]
+    (recordings / "binders").mkdir(parents=True, exist_ok=True)
+    (recordings / "binders" / f"{binder_id}.json").write_text(json.dumps(pages))
+
+
+def run_benchmark(num_cards: int = 8_000, latency: float = 0.1) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        write_binder(Path(directory), "binder", num_cards)
+        moxfield_connector.MOXFIELD_API_URL = _serve_in_background(
+            Path(directory), latency
+        )
+
+        default_sizes = moxfield_connector.BINDER_PAGE_SIZES
+        default_window = moxfield_connector.MAX_CONCURRENT_PAGES
+        expected = None
+        for label, page_sizes, window in [
+            ("serial, 100 per page", (100,), 1),
+            ("concurrent, 100 per page", (100,), default_window),
+            ("concurrent, adaptive size", default_sizes, default_window),
+        ]:
+            moxfield_connector.BINDER_PAGE_SIZES = page_sizes
+            moxfield_connector.MAX_CONCURRENT_PAGES = window
+            MoxfieldConnector._binder_page_size = page_sizes[0]
+            MoxfieldConnector.clear_recent_payloads()
+
+            start = time.perf_counter()
+            cards = MoxfieldConnector.get_binder_content("binder")
+            elapsed = time.perf_counter() - start
+
+            ids = [card["card"]["uniqueCardId"] for card in cards]
+            expected = expected or ids
+            assert ids == expected, "pages were reassembled out of order"
+            results.append(
+                {
+                    "fetch": label,
+                    "page_size": MoxfieldConnector._binder_page_size,
+                    "cards": len(cards),
+                    "seconds": elapsed,
+                }
+            )
+
+        moxfield_connector.BINDER_PAGE_SIZES = default_sizes
+        moxfield_connector.MAX_CONCURRENT_PAGES = default_window
+    return results
+
+
+if __name__ == "__main__":
+    print("Fetching an 8,000-card binder at 100 ms per request")
+    print(f"{'Fetch':<28}{'Page size':>10}{'Cards':>8}{'Seconds':>10}")
+    print("-" * 56)
+    for result in run_benchmark():
+        print(
+            f"{result['fetch']:<28}"
+            f"{result['page_size']:>10,}"
+            f"{result['cards']:>8,}"
+            f"{result['seconds']:>10.4f}"
+        )
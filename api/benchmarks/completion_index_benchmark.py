@@ -0,0 +1,100 @@
+"""
+Benchmark for ranking commanders by collection completion.
+
+Ranks synthetic average decks against a collection the way
+find_commanders.analyze_commander did (a set-membership test per card, one
+commander at a time) and with a CompletionIndex, then re-ranks after a
+collection update, which only rebuilds the owned-cards vector.
+
+Run from the api directory:
+    python benchmarks/completion_index_benchmark.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.completion_index import CompletionIndex
+
+
+def build_decks(
+    num_commanders: int, pool_size: int = 30_000, deck_size: int = 64, seed: int = 0
+) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    # Staples show up everywhere, the long tail rarely
+    weights = [1 / (rank + 1) for rank in range(pool_size)]
+    pool = [f"Card {i}" for i in range(pool_size)]
+    return {
+        f"Commander {i}": list(set(rng.choices(pool, weights, k=deck_size)))
+        for i in range(num_commanders)
+    }
+
+
+def _rank_by_loop(decks: dict[str, list[str]], collection: set[str]) -> list[dict]:
+    results = []
+    for commander, cards in decks.items():
+        owned = sum(card in collection for card in cards)
+        results.append(
+            {
+                "commander": commander,
+                "completion_percentage": round(owned / len(cards) * 100, 2),
+            }
+        )
+    results.sort(key=lambda result: result["completion_percentage"], reverse=True)
+    return results
+
+
+def run_benchmark(sizes=(1_000, 5_000, 20_000)) -> list[dict]:
+    results = []
+    for num_commanders in sizes:
+        decks = build_decks(num_commanders)
+        rng = random.Random(1)
+        collection = {f"Card {i}" for i in rng.sample(range(30_000), 6_000)}
+
+        start = time.perf_counter()
+        expected = _rank_by_loop(decks, collection)
+        loop = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = CompletionIndex(decks)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ranked = index.rank(collection)
+        rank = time.perf_counter() - start
+        assert [r["completion_percentage"] for r in ranked] == [
+            r["completion_percentage"] for r in expected
+        ], "index disagrees with the per-commander loop"
+
+        collection |= {f"Card {i}" for i in rng.sample(range(30_000), 50)}
+        start = time.perf_counter()
+        index.rank(collection)
+        rerank = time.perf_counter() - start
+
+        results.append(
+            {
+                "commanders": num_commanders,
+                "loop": loop,
+                "build": build,
+                "rank": rank,
+                "rerank": rerank,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    print("Ranking commanders against a 6,000-card collection (seconds)")
+    print(f"{'Commanders':>10}{'Loop':>10}{'Build':>10}{'Rank':>10}{'Re-rank':>10}")
+    print("-" * 50)
+    for result in run_benchmark():
+        print(
+            f"{result['commanders']:>10,}"
+            f"{result['loop']:>10.4f}"
+            f"{result['build']:>10.4f}"
+            f"{result['rank']:>10.4f}"
+            f"{result['rerank']:>10.4f}"
+        )
@@ -0,0 +1,130 @@
+"""
+Benchmark for extracting overall inclusion from EDHREC card pages.
+
+Compares parse_inclusion_html (BeautifulSoup tree + get_text + regex) on the
+HTML card page with parse_inclusion_json on the card's JSON page, over card
+pages saved from EDHREC, and checks that both give the same percentage. Parse
+CPU only; no requests are made while benchmarking.
+
+Every `<slug>.html` of the fixtures directory (default: fixtures/edhrec next
+to this file) is paired with `<slug>.json` when present.
+
+Run from the api directory:
+    python benchmarks/edhrec_parse_benchmark.py [fixtures_dir]
+Save (or refresh) the fixtures of some cards from EDHREC first:
+    python benchmarks/edhrec_parse_benchmark.py --capture sol-ring arcane-signet
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.edhrec_extended import (
+    EDHREC_JSON_PAGES_URL,
+    EDHRecExtended,
+    parse_inclusion_html,
+    parse_inclusion_json,
+)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures" / "edhrec"
+
+
+def capture_fixtures(slugs: list[str], directory: Path = FIXTURES_DIR):
+    """Save the HTML and JSON card pages of `slugs` as they are served today"""
+    directory.mkdir(parents=True, exist_ok=True)
+    session = EDHRecExtended().session
+    for slug in slugs:
+        html = session.get(
+            f"https://edhrec.com/cards/{slug}",
+            headers={"Accept": "text/html"},
+            timeout=10,
+        )
+        html.raise_for_status()
+        (directory / f"{slug}.html").write_bytes(html.content)
+
+        payload = session.get(f"{EDHREC_JSON_PAGES_URL}/cards/{slug}.json", timeout=10)
+        if payload.status_code == 200:
+            (directory / f"{slug}.json").write_bytes(payload.content)
+        print(f"Saved {slug} ({len(html.content) / 1e3:.0f} KB of HTML)")
+
+
+def _percentage(counts):
+    return counts[0] if counts else None
+
+
+def run_benchmark(directory: Path, repeat: int = 3) -> list[dict]:
+    pages = []
+    for html_path in sorted(directory.glob("*.html")):
+        json_path = html_path.with_suffix(".json")
+        pages.append(
+            (
+                html_path.read_bytes(),
+                json_path.read_bytes() if json_path.exists() else None,
+            )
+        )
+
+    # (label, reads the JSON page, extract)
+    extractors = [
+        (
+            "HTML page",
+            False,
+            lambda html: _percentage(parse_inclusion_html(html)),
+        ),
+        (
+            "JSON page",
+            True,
+            lambda payload: _percentage(parse_inclusion_json(json.loads(payload))),
+        ),
+    ]
+    results = []
+    expected = {}
+    for label, reads_json, extract in extractors:
+        inputs = [
+            (position, payload if reads_json else html)
+            for position, (html, payload) in enumerate(pages)
+            if payload is not None or not reads_json
+        ]
+        start = time.perf_counter()
+        for _ in range(repeat):
+            values = {position: extract(content) for position, content in inputs}
+        elapsed = (time.perf_counter() - start) / repeat
+        for position, value in values.items():
+            # The JSON page has no counts for a card no deck plays yet
+            if value is None and reads_json:
+                continue
+            previous = expected.setdefault(position, value)
+            assert (
+                value == previous
+            ), f"{label} disagrees with the HTML page: {value} != {previous}"
+        results.append(
+            {
+                "extractor": label,
+                "pages": len(inputs),
+                "ms_per_page": elapsed / max(len(inputs), 1) * 1000,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--capture"]:
+        capture_fixtures(sys.argv[2:])
+        sys.exit()
+
+    fixtures = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURES_DIR
+    if not any(fixtures.glob("*.html")):
+        sys.exit(f"No saved card pages in {fixtures}; run with --capture first")
+
+    size = sum(p.stat().st_size for p in fixtures.glob("*.html"))
+    print(f"Extracting inclusion from {size / 1e6:.1f} MB of card pages")
+    print(f"{'Extractor':<26}{'Pages':>8}{'ms/page':>10}")
+    print("-" * 44)
+    for result in run_benchmark(fixtures):
+        print(
+            f"{result['extractor']:<26}"
+            f"{result['pages']:>8}"
+            f"{result['ms_per_page']:>10.3f}"
+        )
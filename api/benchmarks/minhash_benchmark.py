@@ -0,0 +1,98 @@
+"""
+Benchmark for the MinHash/LSH nearest-commander index.
+
+Builds synthetic average decks grouped in archetypes (decks of one archetype
+share most of a core, like commanders of the same colors and theme do),
+indexes them, and compares top-10 queries against an exact scan of every
+deck: query time and recall of the exact top 10.
+
+Run from the api directory:
+    python benchmarks/minhash_benchmark.py
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.minhash_index import MinHashIndex
+
+
+def build_archetype_decks(
+    num_commanders: int,
+    num_archetypes: int = 200,
+    pool_size: int = 30_000,
+    deck_size: int = 64,
+    core_share: float = 0.7,
+    seed: int = 0,
+) -> dict[str, set[str]]:
+    rng = random.Random(seed)
+    pool = [f"Card {i}" for i in range(pool_size)]
+    cores = [rng.sample(pool, deck_size) for _ in range(num_archetypes)]
+    decks = {}
+    for i in range(num_commanders):
+        core = cores[rng.randrange(num_archetypes)]
+        deck = set(rng.sample(core, int(deck_size * core_share)))
+        while len(deck) < deck_size:
+            deck.add(rng.choice(pool))
+        decks[f"Commander {i}"] = deck
+    return decks
+
+
+def _exact_top(decks: dict[str, set[str]], key: str, k: int) -> list[str]:
+    cards = decks[key]
+    scores = [
+        (other, len(cards & other_cards) / len(cards | other_cards))
+        for other, other_cards in decks.items()
+        if other != key
+    ]
+    scores.sort(key=lambda score: score[1], reverse=True)
+    return [other for other, _ in scores[:k]]
+
+
+def run_benchmark(
+    num_commanders: int = 20_000, num_queries: int = 50, k: int = 10
+) -> dict:
+    decks = build_archetype_decks(num_commanders)
+
+    start = time.perf_counter()
+    index = MinHashIndex.from_decks(decks)
+    build = time.perf_counter() - start
+
+    queries = random.Random(1).sample(list(decks), num_queries)
+    start = time.perf_counter()
+    answers = [index.query_key(key, k=k) for key in queries]
+    query = (time.perf_counter() - start) / num_queries
+
+    start = time.perf_counter()
+    expected = [_exact_top(decks, key, k) for key in queries]
+    exact = (time.perf_counter() - start) / num_queries
+
+    # Ties make the exact top k ambiguous; compare similarity values instead
+    hits = 0
+    for key, answer, truth in zip(queries, answers, expected):
+        kth = len(decks[key] & decks[truth[-1]]) / len(decks[key] | decks[truth[-1]])
+        hits += sum(similarity >= kth for _, similarity in answer)
+    start = time.perf_counter()
+    index.add("New commander", decks[queries[0]])
+    insert = time.perf_counter() - start
+
+    return {
+        "commanders": num_commanders,
+        "build": build,
+        "insert_ms": insert * 1000,
+        "query_ms": query * 1000,
+        "exact_ms": exact * 1000,
+        "recall": hits / (num_queries * k),
+    }
+
+
+if __name__ == "__main__":
+    result = run_benchmark()
+    print(f"Indexed {result['commanders']:,} commanders in {result['build']:.2f} s")
+    print(f"Incremental insert: {result['insert_ms']:.3f} ms")
+    print(f"Top-10 query:       {result['query_ms']:.3f} ms")
+    print(f"Exact scan:         {result['exact_ms']:.3f} ms")
+    print(f"Recall@10:          {result['recall']:.1%}")
@@ -0,0 +1,152 @@
+"""
+Local stand-in for the Moxfield API that replays recorded JSON.
+
+Recordings live in a directory laid out as:
+    decks/<id>.json      payload of GET /v3/decks/all/<id>
+    binders/<id>.json    list of payloads of GET /v1/trade-binders/<id>/search,
+                         one per page; the cards are re-paginated at whatever
+                         pageSize the client asks for, up to --max-page-size
+
+Record real collections, then serve them (run from the api directory):
+    python benchmarks/moxfield_stub_server.py record recordings deck:<id> binder:<id>
+    python benchmarks/moxfield_stub_server.py serve recordings --port 8765 --latency 0.2
+
+and point AsyncMoxfieldConnector(base_url="http://localhost:8765") at it.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.moxfield_connector import (
+    BINDER_SEARCH_PATH,
+    DECK_PATH,
+    MOXFIELD_API_URL,
+    MoxfieldConnector,
+)
+
+
+def create_app(
+    recordings: Path, latency: float = 0.0, max_page_size: int = 1000
+) -> web.Application:
+    """
+    :param recordings: directory of recorded payloads
+    :param latency: seconds to wait before answering each request
+    :param max_page_size: largest binder pageSize accepted; larger ones get a 400
+    """
+
+    def respond(request: web.Request, body: bytes) -> web.Response:
+        # ETags let clients revalidate with If-None-Match and get a bodiless 304
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            body=body, content_type="application/json", headers={"ETag": etag}
+        )
+
+    async def deck(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        path = recordings / "decks" / f"{request.match_info['id']}.json"
+        if not path.exists():
+            raise web.HTTPNotFound()
+        return respond(request, path.read_bytes())
+
+    async def binder(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        path = recordings / "binders" / f"{request.match_info['id']}.json"
+        if not path.exists():
+            raise web.HTTPNotFound()
+        page_size = int(request.query.get("pageSize", 100))
+        if not 1 <= page_size <= max_page_size:
+            raise web.HTTPBadRequest()
+
+        pages = json.loads(path.read_bytes())
+        cards = [card for page in pages for card in page["data"]]
+        total_pages = max(1, -(-len(cards) // page_size))
+        page_number = int(request.query.get("pageNumber", 1))
+        if not 1 <= page_number <= total_pages:
+            raise web.HTTPNotFound()
+
+        start = (page_number - 1) * page_size
+        page = {
+            **pages[0],
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "totalPages": total_pages,
+            "totalResults": len(cards),
+            "data": cards[start : start + page_size],
+        }
+        return respond(request, json.dumps(page).encode())
+
+    app = web.Application()
+    app.router.add_get(DECK_PATH, deck)
+    app.router.add_get(BINDER_SEARCH_PATH, binder)
+    return app
+
+
+def record(recordings: Path, targets: list[str]):
+    """Save live Moxfield payloads for `deck:<id>` and `binder:<id>` targets"""
+    import cloudscraper
+
+    scraper = cloudscraper.create_scraper()
+    headers = MoxfieldConnector._build_headers()
+    (recordings / "decks").mkdir(parents=True, exist_ok=True)
+    (recordings / "binders").mkdir(parents=True, exist_ok=True)
+
+    for target in targets:
+        kind, id = target.split(":", 1)
+        if kind == "deck":
+            response = scraper.get(
+                MOXFIELD_API_URL + DECK_PATH.format(id=id), headers=headers
+            )
+            response.raise_for_status()
+            (recordings / "decks" / f"{id}.json").write_bytes(response.content)
+        elif kind == "binder":
+            pages = []
+            page_number = 1
+            while True:
+                response = scraper.get(
+                    MOXFIELD_API_URL + BINDER_SEARCH_PATH.format(id=id),
+                    headers=headers,
+                    params=MoxfieldConnector._binder_params(page_number),
+                )
+                response.raise_for_status()
+                pages.append(response.json())
+                if pages[-1]["totalPages"] <= page_number or not pages[-1]["data"]:
+                    break
+                page_number += 1
+            (recordings / "binders" / f"{id}.json").write_text(json.dumps(pages))
+        else:
+            raise ValueError(f"Expected deck:<id> or binder:<id>, got {target}")
+        print(f"Recorded {target}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve")
+    serve_parser.add_argument("recordings", type=Path)
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--latency", type=float, default=0.0)
+    serve_parser.add_argument("--max-page-size", type=int, default=1000)
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("recordings", type=Path)
+    record_parser.add_argument("targets", nargs="+")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        web.run_app(
+            create_app(args.recordings, args.latency, args.max_page_size),
+            port=args.port,
+        )
+    else:
+        record(args.recordings, args.targets)
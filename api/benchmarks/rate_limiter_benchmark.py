@@ -0,0 +1,69 @@
+"""
+Benchmark for the shared token-bucket rate limiter.
+
+Starts several processes with several threads each, all taking tokens for the
+same host from one bucket directory, and reports the aggregate request rate
+they achieved against the configured ceiling. Without a shared bucket each
+process would get its own budget and the aggregate would scale with the
+number of processes.
+
+Run from the api directory:
+    python benchmarks/rate_limiter_benchmark.py
+"""
+
+import multiprocessing
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from services.rate_limiter import HostLimit, RateLimiter
+
+HOST = "upstream.test"
+
+
+def _worker(directory: str, limit: HostLimit, threads: int, requests: int) -> list:
+    limiter = RateLimiter(directory, {HOST: limit})
+
+    def send(_):
+        limiter.acquire(HOST)
+        return time.time()
+
+    with ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(send, range(requests)))
+
+
+def run_benchmark(
+    rate: float = 50.0,
+    burst: int = 10,
+    processes: int = 4,
+    threads: int = 8,
+    requests_per_process: int = 100,
+) -> dict:
+    limit = HostLimit(rate=rate, burst=burst)
+    with tempfile.TemporaryDirectory() as directory:
+        with multiprocessing.Pool(processes) as pool:
+            sent = pool.starmap(
+                _worker,
+                [(directory, limit, threads, requests_per_process)] * processes,
+            )
+    times = sorted(t for process in sent for t in process)
+    # The initial burst is free; the rest has to follow the refill rate
+    elapsed = times[-1] - times[burst]
+    return {
+        "requests": len(times),
+        "seconds": times[-1] - times[0],
+        "rate": (len(times) - burst - 1) / elapsed,
+        "ceiling": rate,
+    }
+
+
+if __name__ == "__main__":
+    print("4 processes x 8 threads sending 400 requests to one host at 50/s")
+    result = run_benchmark()
+    print(f"Requests:      {result['requests']:,}")
+    print(f"Seconds:       {result['seconds']:.2f}")
+    print(f"Observed rate: {result['rate']:.1f}/s (ceiling {result['ceiling']:.0f}/s)")
@@ -0,0 +1,107 @@
+"""
+Benchmark for the pairwise Jaccard similarity behind
+analyze_decks.analyze_commander_redundancy.
+
+Compares the previous double loop over every (i, j) with set & / set |
+against deck_similarity.jaccard_matrix on synthetic average decks (the loop
+is only timed up to 500 commanders), then times adding one commander to a
+persisted RedundancyMatrix against rebuilding the whole matrix.
+
+Run from the api directory:
+    python benchmarks/redundancy_benchmark.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+
+from completion_index_benchmark import build_decks
+from services.deck_similarity import jaccard_matrix
+from services.redundancy_matrix import RedundancyMatrix
+
+LOOP_LIMIT = 500
+
+
+def _jaccard_by_loop(decks: list[set[str]]) -> np.ndarray:
+    n = len(decks)
+    matrix = np.ones((n, n))
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                union = len(decks[i] | decks[j])
+                matrix[i, j] = (
+                    len(decks[i] & decks[j]) / union if decks[i] and decks[j] else 0.0
+                )
+    return matrix
+
+
+def run_benchmark(sizes=(100, 500, 2_000)) -> list[dict]:
+    results = []
+    for num_commanders in sizes:
+        decks = [set(cards) for cards in build_decks(num_commanders).values()]
+        decks[0] = set()  # a failed fetch
+
+        start = time.perf_counter()
+        similarity = jaccard_matrix(decks)
+        vectorized = time.perf_counter() - start
+
+        loop = None
+        if num_commanders <= LOOP_LIMIT:
+            start = time.perf_counter()
+            expected = _jaccard_by_loop(decks)
+            loop = time.perf_counter() - start
+            assert np.allclose(similarity, expected), "matrices differ"
+
+        results.append(
+            {"commanders": num_commanders, "loop": loop, "vectorized": vectorized}
+        )
+    return results
+
+
+def run_incremental_benchmark(num_commanders: int = 2_000) -> dict:
+    decks = build_decks(num_commanders + 1)
+    names = list(decks)
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "redundancy.npz")
+        matrix = RedundancyMatrix(path)
+        matrix.update({name: set(decks[name]) for name in names[:-1]})
+        matrix.save()
+
+        start = time.perf_counter()
+        matrix = RedundancyMatrix.load(path)
+        matrix.update({names[-1]: set(decks[names[-1]])})
+        matrix.save()
+        incremental = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = jaccard_matrix([set(decks[name]) for name in names])
+    rebuild = time.perf_counter() - start
+    assert np.allclose(matrix.submatrix(names), expected), "matrices differ"
+    return {
+        "commanders": num_commanders,
+        "rebuild": rebuild,
+        "incremental": incremental,
+    }
+
+
+if __name__ == "__main__":
+    print("Pairwise Jaccard similarity of 64-card decks (seconds)")
+    print(f"{'Commanders':>10}{'Loop':>10}{'Vectorized':>12}")
+    print("-" * 32)
+    for result in run_benchmark():
+        loop = f"{result['loop']:.4f}" if result["loop"] is not None else "-"
+        print(
+            f"{result['commanders']:>10,}"
+            f"{loop:>10}"
+            f"{result['vectorized']:>12.4f}"
+        )
+
+    result = run_incremental_benchmark()
+    print(f"\nAdding 1 commander to {result['commanders']:,} (seconds)")
+    print(f"Full rebuild:                 {result['rebuild']:.4f}")
+    print(f"Load, update and save matrix: {result['incremental']:.4f}")
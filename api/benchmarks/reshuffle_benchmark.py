@@ -0,0 +1,390 @@
+"""
+Benchmark for ShuffleManager allocation on synthetic binder-to-many-decks runs.
+
+Run from the api directory:
+    python benchmarks/reshuffle_benchmark.py
+"""
+
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from models import Collection
+from services.moxfield_connector import MoxfieldConnector
+from services.shuffle_manager import ShuffleManager
+
+
+class StubMoxfieldConnector(MoxfieldConnector):
+    """
+    Serves pre-generated Moxfield-shaped payloads instead of hitting the API,
+    optionally sleeping `latency` seconds per request to mimic the network
+    """
+
+    def __init__(self, contents: dict[str, list[dict]], latency: float = 0.0):
+        self.contents = contents
+        self.latency = latency
+
+    def get_deck_content(self, id: str, include_sideboard: bool = False) -> list[dict]:
+        time.sleep(self.latency)
+        return self.contents[id]
+
+    def get_binder_content(self, id: str) -> list[dict]:
+        time.sleep(self.latency)
+        return self.contents[id]
+
+
+def _card_payload(card_index: int, quantity: int) -> dict:
+    return {
+        "quantity": quantity,
+        "card": {
+            "uniqueCardId": f"card-{card_index}",
+            "name": f"Card {card_index}",
+            "type_line": "Artifact",
+            "color_identity": [],
+            "prices": {"usd": 1.0},
+        },
+    }
+
+
+def build_scenario(
+    binder_copies: int,
+    num_decks: int = 20,
+    deck_size: int = 100,
+    seed: int = 0,
+    num_binders: int = 1,
+) -> tuple[list[Collection], StubMoxfieldConnector]:
+    """
+    One large source binder feeding many target decks, plus one source deck
+    that overlaps with the targets so priorities come into play.
+    """
+    rng = random.Random(seed)
+    pool_size = max(binder_copies // 4, deck_size)
+
+    contents = {}
+    collections = [
+        Collection(
+            name="Retired deck",
+            url="https://moxfield.com/decks/retired",
+            is_source=True,
+            priority=5,
+        ),
+    ]
+    for binder_index in range(num_binders):
+        binder_id = f"binder-{binder_index}"
+        collections.append(
+            Collection(
+                name=f"Binder {binder_index}",
+                url=f"https://moxfield.com/binders/{binder_id}",
+                is_source=True,
+                priority=rng.randint(1, 2),
+            )
+        )
+        binder_counts = {}
+        for _ in range(binder_copies // num_binders):
+            card_index = rng.randrange(pool_size)
+            binder_counts[card_index] = binder_counts.get(card_index, 0) + 1
+        contents[binder_id] = [_card_payload(i, q) for i, q in binder_counts.items()]
+    contents["retired"] = [
+        _card_payload(i, 1) for i in rng.sample(range(pool_size), deck_size)
+    ]
+
+    for deck_index in range(num_decks):
+        deck_id = f"deck-{deck_index}"
+        collections.append(
+            Collection(
+                name=f"Deck {deck_index}",
+                url=f"https://moxfield.com/decks/{deck_id}",
+                is_source=False,
+                priority=rng.randint(1, 5),
+            )
+        )
+        contents[deck_id] = [
+            _card_payload(i, 1) for i in rng.sample(range(pool_size), deck_size)
+        ]
+
+    return collections, StubMoxfieldConnector(contents)
+
+
+def measure_construction(binder_sizes: list[int], num_decks: int = 40) -> list[dict]:
+    """Time and peak traced memory of loading the collections into a manager"""
+    results = []
+    for binder_copies in binder_sizes:
+        collections, connector = build_scenario(binder_copies, num_decks=num_decks)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        ShuffleManager(collections, moxfield_connector=connector)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append(
+            {"binder_copies": binder_copies, "seconds": elapsed, "peak_mb": peak / 1e6}
+        )
+    return results
+
+
+def measure_export(binder_copies: int = 64_000, num_decks: int = 40) -> list[dict]:
+    """Time and peak traced memory of writing the xlsx, per copy and aggregated"""
+    results = []
+    for aggregate in [False, True]:
+        collections, connector = build_scenario(binder_copies, num_decks=num_decks)
+        manager = ShuffleManager(collections, moxfield_connector=connector)
+        manager.allocate()
+
+        with tempfile.TemporaryFile() as output:
+            start = time.perf_counter()
+            manager.write_excel_file(output, aggregate=aggregate)
+            elapsed = time.perf_counter() - start
+            size = output.tell()
+
+        # Measure memory on a second pass so tracing does not skew the timing
+        with tempfile.TemporaryFile() as output:
+            tracemalloc.start()
+            manager.write_excel_file(output, aggregate=aggregate)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        results.append(
+            {
+                "rows": "aggregated" if aggregate else "per copy",
+                "seconds": elapsed,
+                "peak_mb": peak / 1e6,
+                "file_mb": size / 1e6,
+            }
+        )
+    return results
+
+
+def measure_fetch(
+    num_decks: int = 20, latency: float = 0.25, num_binders: int = 2
+) -> list[dict]:
+    """Loading collections one after another against fetch_many, at a fixed latency"""
+    collections, connector = build_scenario(
+        1_000, num_decks=num_decks, num_binders=num_binders
+    )
+    connector.latency = latency
+
+    start = time.perf_counter()
+    for collection in collections:
+        if collection.is_deck:
+            connector.get_deck_content(collection.moxfield_id)
+        else:
+            connector.get_binder_content(collection.moxfield_id)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ShuffleManager(collections, moxfield_connector=connector)
+    concurrent = time.perf_counter() - start
+
+    return [
+        {
+            "loader": "sequential",
+            "collections": len(collections),
+            "seconds": sequential,
+        },
+        {
+            "loader": "fetch_many",
+            "collections": len(collections),
+            "seconds": concurrent,
+        },
+    ]
+
+
+def run_benchmark(binder_sizes: list[int], num_decks: int = 40) -> list[dict]:
+    results = []
+    for binder_copies in binder_sizes:
+        collections, connector = build_scenario(binder_copies, num_decks=num_decks)
+        manager = ShuffleManager(collections, moxfield_connector=connector)
+
+        # Time the pair search on its own so the per-card move cost is visible
+        search_time = 0.0
+        find_optimal_movement = manager._find_optimal_movement
+
+        def timed_find_optimal_movement():
+            nonlocal search_time
+            search_start = time.perf_counter()
+            movement = find_optimal_movement()
+            search_time += time.perf_counter() - search_start
+            return movement
+
+        manager._find_optimal_movement = timed_find_optimal_movement
+
+        start = time.perf_counter()
+        manager.allocate()
+        elapsed = time.perf_counter() - start
+
+        moved = manager.allocated_count
+        move_time = elapsed - search_time
+        results.append(
+            {
+                "binder_copies": binder_copies,
+                "moved": moved,
+                "seconds": elapsed,
+                "search_seconds": search_time,
+                "us_per_moved_card": move_time / moved * 1e6 if moved else 0.0,
+            }
+        )
+    return results
+
+
+def compare_modes(
+    binder_copies: int = 20_000,
+    num_binders: int = 5,
+    num_decks: int = 45,
+    max_moves: int = 60,
+) -> list[dict]:
+    """
+    Greedy against min-cost flow (uncapped and capped) on the same inputs. The
+    greedy's first `max_moves` movements are scored too, as the capped
+    baseline.
+    """
+
+    def priority_score(movements) -> int:
+        return sum(
+            (m.source.priority + m.target.priority) * m.intersection for m in movements
+        )
+
+    results = []
+    for mode, cap in [("greedy", None), ("flow", None), ("flow", max_moves)]:
+        collections, connector = build_scenario(
+            binder_copies, num_decks=num_decks, num_binders=num_binders
+        )
+        manager = ShuffleManager(collections, moxfield_connector=connector)
+
+        start = time.perf_counter()
+        movements = manager.allocate(mode=mode, max_moves=cap)
+        elapsed = time.perf_counter() - start
+
+        results.append(
+            {
+                "mode": mode if cap is None else f"{mode} (max {cap})",
+                "moved": manager.allocated_count,
+                "movements": len(movements),
+                "priority_score": priority_score(movements),
+                "seconds": elapsed,
+            }
+        )
+        if mode == "greedy":
+            first = movements[:max_moves]
+            results.append(
+                {
+                    "mode": f"greedy (first {max_moves})",
+                    "moved": sum(m.intersection for m in first),
+                    "movements": len(first),
+                    "priority_score": priority_score(first),
+                    "seconds": elapsed,
+                }
+            )
+    return results
+
+
+def compare_engines(
+    binder_copies: int = 40_000, num_binders: int = 30, num_decks: int = 300
+) -> list[dict]:
+    """Dict-based and NumPy greedy engines on hundreds of collections"""
+    results = []
+    plans = {}
+    for mode in ["greedy", "matrix"]:
+        collections, connector = build_scenario(
+            binder_copies, num_decks=num_decks, num_binders=num_binders
+        )
+        manager = ShuffleManager(collections, moxfield_connector=connector)
+
+        start = time.perf_counter()
+        movements = manager.allocate(mode=mode)
+        elapsed = time.perf_counter() - start
+
+        plans[mode] = [
+            (m.source.name, m.target.name, m.intersection_cards) for m in movements
+        ]
+        results.append(
+            {
+                "mode": mode,
+                "collections": len(collections),
+                "movements": len(movements),
+                "seconds": elapsed,
+            }
+        )
+    assert plans["greedy"] == plans["matrix"], "engines produced different movements"
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [1_000, 4_000, 16_000, 64_000]
+
+    print(f"{'Binder copies':>14}{'Build s':>12}{'Peak MB':>12}")
+    print("-" * 38)
+    for result in measure_construction(sizes):
+        print(
+            f"{result['binder_copies']:>14,}"
+            f"{result['seconds']:>12.4f}"
+            f"{result['peak_mb']:>12.2f}"
+        )
+    print()
+
+    print(
+        f"{'Binder copies':>14}{'Moved':>10}{'Total s':>12}"
+        f"{'Search s':>12}{'Move us/card':>15}"
+    )
+    print("-" * 63)
+    for result in run_benchmark(sizes):
+        print(
+            f"{result['binder_copies']:>14,}"
+            f"{result['moved']:>10,}"
+            f"{result['seconds']:>12.4f}"
+            f"{result['search_seconds']:>12.4f}"
+            f"{result['us_per_moved_card']:>15.2f}"
+        )
+
+    print("\nGreedy vs min-cost flow: 50 collections, 20,000 binder copies")
+    print(
+        f"{'Mode':<18}{'Moved':>10}{'Movements':>12}"
+        f"{'Priority score':>17}{'Seconds':>10}"
+    )
+    print("-" * 67)
+    for result in compare_modes():
+        print(
+            f"{result['mode']:<18}"
+            f"{result['moved']:>10,}"
+            f"{result['movements']:>12,}"
+            f"{result['priority_score']:>17,}"
+            f"{result['seconds']:>10.4f}"
+        )
+
+    print("\nGreedy engines on 331 collections (identical movements)")
+    print(f"{'Mode':<18}{'Collections':>12}{'Movements':>12}{'Seconds':>10}")
+    print("-" * 52)
+    for result in compare_engines():
+        print(
+            f"{result['mode']:<18}"
+            f"{result['collections']:>12,}"
+            f"{result['movements']:>12,}"
+            f"{result['seconds']:>10.4f}"
+        )
+
+    print("\nLoading 23 collections at 250 ms per request")
+    print(f"{'Loader':<14}{'Collections':>12}{'Seconds':>10}")
+    print("-" * 36)
+    for result in measure_fetch():
+        print(
+            f"{result['loader']:<14}"
+            f"{result['collections']:>12,}"
+            f"{result['seconds']:>10.4f}"
+        )
+
+    print("\nExport of a 64,000-copy binder against 40 decks")
+    print(f"{'Rows':<14}{'Seconds':>10}{'Peak MB':>10}{'File MB':>10}")
+    print("-" * 44)
+    for result in measure_export():
+        print(
+            f"{result['rows']:<14}"
+            f"{result['seconds']:>10.4f}"
+            f"{result['peak_mb']:>10.2f}"
+            f"{result['file_mb']:>10.2f}"
+        )
@@ -0,0 +1,85 @@
+"""
+Benchmark for the on-disk Moxfield response cache.
+
+Runs the same reshuffle four times against the local stub server, forgetting
+the in-process payload memo between runs the way a fresh gunicorn worker or a
+restart would: without a cache, with an empty cache, with every entry fresh,
+and with every entry stale so it is revalidated with If-None-Match.
+
+Run from the api directory:
+    python benchmarks/response_cache_benchmark.py
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import services.moxfield_connector as moxfield_connector
+from async_fetch_benchmark import write_recordings
+from binder_fetch_benchmark import write_binder
+from models import Collection
+from scraper_pool_benchmark import _serve_in_background
+from services.moxfield_connector import MoxfieldConnector
+from services.response_cache import ResponseCache
+from services.shuffle_manager import ShuffleManager
+
+
+def run_benchmark(
+    num_decks: int = 20, binder_cards: int = 8_000, latency: float = 0.3
+) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        recordings = Path(directory)
+        deck_ids = write_recordings(recordings, num_decks)
+        write_binder(recordings, "binder", binder_cards)
+        moxfield_connector.MOXFIELD_API_URL = _serve_in_background(recordings, latency)
+
+        collections = [
+            Collection(
+                name="Binder",
+                url="https://moxfield.com/binders/binder",
+                is_source=True,
+            )
+        ] + [
+            Collection(
+                name=deck_id,
+                url=f"https://moxfield.com/decks/{deck_id}",
+                is_source=False,
+            )
+            for deck_id in deck_ids
+        ]
+
+        cache = ResponseCache(str(recordings / "cache.sqlite3"))
+        for label, response_cache, ttl in [
+            ("no cache", None, None),
+            ("empty cache", cache, 600.0),
+            ("fresh entries", cache, 600.0),
+            ("stale, revalidated", cache, 0.0),
+        ]:
+            moxfield_connector.response_cache = response_cache
+            cache.ttl = ttl
+            MoxfieldConnector.clear_recent_payloads()
+
+            start = time.perf_counter()
+            manager = ShuffleManager(
+                collections, moxfield_connector=MoxfieldConnector()
+            )
+            manager.allocate()
+            elapsed = time.perf_counter() - start
+            results.append(
+                {"run": label, "moved": manager.allocated_count, "seconds": elapsed}
+            )
+
+        moxfield_connector.response_cache = None
+    return results
+
+
+if __name__ == "__main__":
+    print("Reshuffling an 8,000-card binder into 20 decks at 300 ms per request")
+    print(f"{'Run':<22}{'Moved':>8}{'Seconds':>10}")
+    print("-" * 40)
+    for result in run_benchmark():
+        print(f"{result['run']:<22}{result['moved']:>8,}{result['seconds']:>10.4f}")
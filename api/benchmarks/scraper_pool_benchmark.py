@@ -0,0 +1,105 @@
+"""
+Benchmark for the pooled scraper sessions behind MoxfieldConnector.
+
+Serves synthetic decks from the local stub server and fetches them through
+MoxfieldConnector.fetch_many, once with a brand new cloudscraper session per
+request (the previous behaviour) and once through the shared ScraperPool.
+The stub speaks plain HTTP without a Cloudflare challenge, so against the
+real API the gap is wider: each new session there also pays a TLS handshake
+and the challenge round trips.
+
+Run from the api directory:
+    python benchmarks/scraper_pool_benchmark.py
+"""
+
+import asyncio
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cloudscraper
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import services.moxfield_connector as moxfield_connector
+from async_fetch_benchmark import write_recordings
+from moxfield_stub_server import create_app
+from services.moxfield_connector import FetchRequest, MoxfieldConnector
+from services.scraper_pool import ScraperPool
+
+
+def _serve_in_background(recordings: Path, latency: float) -> str:
+    """Start the stub server on a daemon thread; returns its base URL"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    started = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(create_app(recordings, latency))
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", port).start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{port}"
+
+
+class _FreshScraperPerRequest:
+    """Stand-in for the pool that opens a new session for every request"""
+
+    def get(self, url, headers=None, params=None):
+        with cloudscraper.create_scraper() as scraper:
+            return scraper.get(url=url, headers=headers, params=params)
+
+
+def run_benchmark(
+    num_decks: int = 200, latency: float = 0.02, rounds: int = 3
+) -> list[dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        deck_ids = write_recordings(Path(directory), num_decks)
+        moxfield_connector.MOXFIELD_API_URL = _serve_in_background(
+            Path(directory), latency
+        )
+        requests = [FetchRequest(id=deck_id) for deck_id in deck_ids]
+
+        for label, pool in [
+            ("new session per request", _FreshScraperPerRequest()),
+            ("pooled sessions", ScraperPool()),
+        ]:
+            moxfield_connector.scraper_pool = pool
+            start = time.perf_counter()
+            for _ in range(rounds):
+                MoxfieldConnector.clear_recent_payloads()
+                MoxfieldConnector().fetch_many(requests)
+            elapsed = time.perf_counter() - start
+            results.append(
+                {
+                    "sessions": label,
+                    "fetches": num_decks * rounds,
+                    "seconds": elapsed,
+                    "ms_per_fetch": elapsed / (num_decks * rounds) * 1e3,
+                }
+            )
+    return results
+
+
+if __name__ == "__main__":
+    print("Fetching decks from the stub server at 20 ms per request, 8 threads")
+    print(f"{'Sessions':<26}{'Fetches':>9}{'Seconds':>10}{'ms/fetch':>10}")
+    print("-" * 55)
+    for result in run_benchmark():
+        print(
+            f"{result['sessions']:<26}"
+            f"{result['fetches']:>9,}"
+            f"{result['seconds']:>10.4f}"
+            f"{result['ms_per_fetch']:>10.2f}"
+        )
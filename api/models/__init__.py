@@ -1,5 +1,5 @@
 from pydantic import BaseModel, computed_field, Field
-from typing import List, Union
+from typing import Dict, List, Union
 import uuid
 
 
@@ -31,7 +31,15 @@ class Movement(BaseModel):
     source: Collection
     target: Collection
     intersection: int
-    intersection_cards: List[str]
+    # Copies of each uniqueCardId moved from source to target
+    card_counts: Dict[str, int]
+
+    @property
+    def intersection_cards(self) -> List[str]:
+        """One uniqueCardId per moved copy, built on demand"""
+        return [
+            card_id for card_id, count in self.card_counts.items() for _ in range(count)
+        ]
 
 
 class Card(BaseModel):
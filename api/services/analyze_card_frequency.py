@@ -1,10 +1,12 @@
 """
 Script to analyze card frequencies across multiple Moxfield decks.
 Excludes basic lands and shows which cards appear most frequently.
+
+Run from the api/ directory, like app.py: python -m services.analyze_card_frequency
 """
 
 from collections import Counter
-from api.services.moxfield_connector import MoxfieldConnector
+from services.moxfield_connector import MoxfieldConnector, FetchRequest
 
 # List of basic land names to exclude
 BASIC_LANDS = ["plains", "island", "swamp", "mountain", "forest"]
@@ -27,30 +29,33 @@ def analyze_card_frequency(
     card_counter = Counter()
     card_prices = {}
 
-    for url in deck_urls:
-        # Extract deck ID from URL (last part after '/')
-        deck_id = url.strip().split("/")[-1]
-
-        try:
-            print(f"Fetching deck: {deck_id}")
-            deck_content = MoxfieldConnector.get_deck_content(
-                deck_id, include_sideboard=include_sideboard
-            )
-
-            # Count each card (excluding basic lands)
-            for card in deck_content:
-                card_name = card["card"]["name"]
-                if card_name.lower() not in BASIC_LANDS:
-                    card_counter[card_name] += 1
-                    # Store the price (will be the same for all instances)
-                    if card_name not in card_prices:
-                        price = card["card"].get("prices", {}).get("usd")
-                        card_prices[card_name] = float(price) if price else 0.0
-
-        except Exception as e:
-            print(f"Error fetching deck {deck_id}: {e}")
+    # Extract deck IDs from URLs (last part after '/')
+    deck_ids = [url.strip().split("/")[-1] for url in deck_urls]
+
+    print(f"Fetching {len(deck_ids)} decks...")
+    contents = MoxfieldConnector().fetch_many(
+        [
+            FetchRequest(id=deck_id, include_sideboard=include_sideboard)
+            for deck_id in deck_ids
+        ],
+        return_exceptions=True,
+    )
+
+    for deck_id, deck_content in zip(deck_ids, contents):
+        if isinstance(deck_content, Exception):
+            print(f"Error fetching deck {deck_id}: {deck_content}")
             continue
 
+        # Count each card (excluding basic lands)
+        for card in deck_content:
+            card_name = card["card"]["name"]
+            if card_name.lower() not in BASIC_LANDS:
+                card_counter[card_name] += 1
+                # Store the price (will be the same for all instances)
+                if card_name not in card_prices:
+                    price = card["card"].get("prices", {}).get("usd")
+                    card_prices[card_name] = float(price) if price else 0.0
+
     # Filter by minimum frequency
     filtered_counter = Counter(
         {k: v for k, v in card_counter.items() if v >= min_frequency}
@@ -1,6 +1,9 @@
-from edhrec import get_average_deck
+from services.deck_similarity import jaccard_matrix, upper_triangle
+from services.edhrec import get_average_decks, iter_average_decks
+from services.minhash_index import MinHashIndex
+from services.redundancy_matrix import RedundancyMatrix
 import pandas as pd
-from typing import Dict, Set
+from typing import Dict, Optional, Set
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
@@ -21,20 +24,43 @@ def calculate_deck_similarity(deck1_cards: Set[str], deck2_cards: Set[str]) -> f
 
 
 def analyze_commander_redundancy(
-    commanders: list[str], debug: bool = False
+    commanders: list[str],
+    debug: bool = False,
+    matrix_path: Optional[str] = None,
+    refresh: bool = False,
 ) -> pd.DataFrame:
     """
     Analyze redundancy across commanders by calculating pairwise similarity.
     Returns a DataFrame matrix showing similarity scores.
+
+    With `matrix_path`, the similarities and card sets are kept in a
+    RedundancyMatrix file between runs: only commanders it does not hold yet
+    are fetched and computed. `refresh` re-reads every commander's deck and
+    recomputes just the ones whose cards changed.
     """
+    matrix = RedundancyMatrix.load(matrix_path) if matrix_path else None
+    decks: Dict[str, Set[str]] = {}
+    to_fetch = commanders
+    if matrix is not None and not refresh:
+        decks = {
+            commander: set(matrix.cards(commander))
+            for commander in commanders
+            if commander in matrix
+        }
+        to_fetch = [commander for commander in commanders if commander not in decks]
+        if decks:
+            print(f"Reusing {len(decks)} stored deck(s) from {matrix_path}")
+
     print("Fetching average decks from EDHREC...")
 
     # Fetch all decks
-    decks: Dict[str, Set[str]] = {}
-    for commander in commanders:
+    fetched = get_average_decks(to_fetch, return_exceptions=True)
+    for commander in to_fetch:
         try:
             print(f"  Fetching deck for: {commander}")
-            deck = get_average_deck(commander)
+            deck = fetched[commander]
+            if isinstance(deck, Exception):
+                raise deck
             # Store non-basic land card names as a set
             decks[commander] = {card.name for card in deck.cards if not card.basic_land}
             print(f"    ✓ Fetched {len(decks[commander])} cards")
@@ -70,19 +96,16 @@ def analyze_commander_redundancy(
                 common_cards = sorted(all_cards)
                 print(f"Universal cards: {', '.join(common_cards)}")
 
-    n = len(commanders)
-    similarity_matrix = []
-
-    for i, cmd1 in enumerate(commanders):
-        row = []
-        for j, cmd2 in enumerate(commanders):
-            if i == j:
-                # Diagonal: same commander
-                similarity = 1.0
-            else:
-                similarity = calculate_deck_similarity(decks[cmd1], decks[cmd2])
-            row.append(similarity)
-        similarity_matrix.append(row)
+    if matrix is None:
+        similarity_matrix = jaccard_matrix(
+            [decks[commander] for commander in commanders]
+        )
+    else:
+        # Failed fetches are left out so they are retried on the next run
+        changed = matrix.update({c: decks[c] for c in commanders if decks[c]})
+        print(f"Computed {len(changed)} of {len(commanders)} commanders' similarities")
+        matrix.save()
+        similarity_matrix = matrix.submatrix(commanders)
 
     # Create DataFrame
     df = pd.DataFrame(similarity_matrix, index=commanders, columns=commanders)
@@ -90,6 +113,25 @@ def analyze_commander_redundancy(
     return df
 
 
+def build_similarity_index(
+    commanders: list[str], index: Optional[MinHashIndex] = None
+) -> MinHashIndex:
+    """
+    Index the non-basic cards of each commander's average deck for
+    "most similar commanders" queries, without the n x n matrix.
+    Decks are added as soon as they are fetched; pass an existing index to
+    only add the commanders it does not have yet.
+    """
+    index = index or MinHashIndex()
+    missing = [commander for commander in commanders if commander not in index]
+    for commander, deck in iter_average_decks(missing):
+        if isinstance(deck, Exception):
+            print(f"    ✗ Error fetching {commander}: {deck}")
+            continue
+        index.add(commander, {card.name for card in deck.cards if not card.basic_land})
+    return index
+
+
 def plot_redundancy_heatmap(
     redundancy_matrix: pd.DataFrame,
     output_file: str = "commander_redundancy_heatmap.png",
@@ -162,8 +204,10 @@ if __name__ == "__main__":
         "Gisa, the Hellraiser",
     ]
 
-    # Analyze redundancy
-    redundancy_matrix = analyze_commander_redundancy(commanders, debug=True)
+    # Analyze redundancy; the matrix file makes later runs incremental
+    redundancy_matrix = analyze_commander_redundancy(
+        commanders, debug=True, matrix_path="commander_redundancy.npz"
+    )
 
     # Display results
     print("\n" + "=" * 80)
@@ -180,10 +224,7 @@ if __name__ == "__main__":
     print("=" * 80)
 
     # Get upper triangle (excluding diagonal) for summary stats
-    import numpy as np
-
-    mask = np.triu(np.ones_like(redundancy_matrix, dtype=bool), k=1)
-    similarities = redundancy_matrix.where(mask).stack().values
+    similarities, rows, columns = upper_triangle(redundancy_matrix.values)
 
     if len(similarities) > 0:
         print(f"Average similarity: {similarities.mean():.3f}")
@@ -194,17 +235,25 @@ if __name__ == "__main__":
         max_idx = similarities.argmax()
         min_idx = similarities.argmin()
 
-        pairs = [
-            (commanders[i], commanders[j])
-            for i in range(len(commanders))
-            for j in range(i + 1, len(commanders))
-        ]
-
         print(
-            f"\nMost similar pair: {pairs[max_idx][0]} <-> {pairs[max_idx][1]} ({similarities[max_idx]:.3f})"
+            f"\nMost similar pair: {commanders[rows[max_idx]]} <-> {commanders[columns[max_idx]]} ({similarities[max_idx]:.3f})"
+        )
+        print(
+            f"Least similar pair: {commanders[rows[min_idx]]} <-> {commanders[columns[min_idx]]} ({similarities[min_idx]:.3f})"
         )
+
+    # Nearest commanders through the MinHash index
+    print("\n" + "=" * 80)
+    print("Most similar commanders:")
+    print("=" * 80)
+    similarity_index = build_similarity_index(commanders)
+    for commander in commanders:
+        if commander not in similarity_index:
+            continue
+        nearest = similarity_index.query_key(commander, k=3)
         print(
-            f"Least similar pair: {pairs[min_idx][0]} <-> {pairs[min_idx][1]} ({similarities[min_idx]:.3f})"
+            f"{commander}: "
+            + ", ".join(f"{other} ({similarity:.3f})" for other, similarity in nearest)
         )
 
     # Generate heatmap visualization
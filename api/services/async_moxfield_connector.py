@@ -0,0 +1,191 @@
+import asyncio
+from typing import NamedTuple, Optional, Union
+
+import aiohttp
+
+from services.moxfield_connector import (
+    BINDER_PAGE_SIZES,
+    BINDER_SEARCH_PATH,
+    DECK_PATH,
+    MAX_CONCURRENT_PAGES,
+    MOXFIELD_API_URL,
+    FetchRequest,
+    MoxfieldConnector,
+)
+from services.retry_policy import RetryPolicy, retry_policy as shared_retry_policy
+
+# Upper bound on open connections to the Moxfield API per connector
+MAX_CONNECTIONS = 200
+
+
+class _Answer(NamedTuple):
+    status: int
+    headers: dict
+    payload: Optional[dict]
+
+
+class AsyncMoxfieldConnector:
+    """
+    asyncio counterpart of MoxfieldConnector with the same method surface.
+
+    One aiohttp session, and so one keep-alive connection pool, is shared by
+    every request made through the connector, which lets a single event loop
+    keep hundreds of fetches in flight. Use it as an async context manager, or
+    call `close()` when done:
+
+        async with AsyncMoxfieldConnector() as connector:
+            cards = await connector.get_deck_content(deck_id)
+
+    Unlike the blocking connector this one does not go through cloudscraper, so
+    it relies on the API answering plain HTTP clients. `base_url` points it at
+    another host, e.g. the stub server in benchmarks/moxfield_stub_server.py.
+    """
+
+    def __init__(
+        self,
+        base_url: str = MOXFIELD_API_URL,
+        max_connections: int = MAX_CONNECTIONS,
+        retry_policy: RetryPolicy = shared_retry_policy,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.retry_policy = retry_policy
+        self._session: Optional[aiohttp.ClientSession] = None
+        # Largest binder page size the search endpoint has accepted so far
+        self._binder_page_size = BINDER_PAGE_SIZES[0]
+
+    async def __aenter__(self) -> "AsyncMoxfieldConnector":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily so it binds to the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers=MoxfieldConnector._build_headers(),
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get_status_and_json(
+        self, path: str, params: Optional[dict] = None
+    ) -> _Answer:
+        async with self.session.get(self.base_url + path, params=params) as response:
+            if response.status != 200:
+                return _Answer(response.status, response.headers, None)
+            return _Answer(
+                response.status,
+                response.headers,
+                await response.json(content_type=None),
+            )
+
+    async def _get(self, path: str, params: Optional[dict] = None) -> _Answer:
+        """GET under the shared retry policy and circuit breaker"""
+        return await self.retry_policy.call_async(
+            self.base_url + path, lambda: self._get_status_and_json(path, params)
+        )
+
+    async def _get_json(
+        self, path: str, params: Optional[dict] = None
+    ) -> Optional[dict]:
+        """GET a JSON payload; None if the final answer was not a 200"""
+        answer = await self._get(path, params)
+        return answer.payload if answer.status == 200 else None
+
+    async def get_deck_name(self, id: str, is_binder: bool = False) -> str:
+        if is_binder:
+            binder = await self._get_json(
+                BINDER_SEARCH_PATH.format(id=id), MoxfieldConnector._binder_params(1)
+            )
+            if binder is None:
+                raise Exception("Failed to fetch binder name")
+            return binder["tradeBinder"]["name"]
+
+        deck = await self._get_json(DECK_PATH.format(id=id))
+        if deck is None:
+            raise Exception("Failed to fetch deck name")
+        return deck["name"]
+
+    async def get_deck_content(
+        self, id: str, include_sideboard: bool = False
+    ) -> list[dict]:
+        deck = await self._get_json(DECK_PATH.format(id=id))
+        if deck is None:
+            raise Exception("Failed to fetch deck content")
+        return MoxfieldConnector._parse_deck_cards(deck, include_sideboard)
+
+    async def _get_binder_page(
+        self, path: str, page_number: int, page_size: int
+    ) -> dict:
+        page = await self._get_json(
+            path, MoxfieldConnector._binder_params(page_number, page_size)
+        )
+        if page is None:
+            raise Exception("Failed to fetch binder content")
+        return page
+
+    async def get_binder_content(self, id: str) -> list[dict]:
+        path = BINDER_SEARCH_PATH.format(id=id)
+        for page_size in BINDER_PAGE_SIZES:
+            if page_size > self._binder_page_size:
+                continue
+            status, _, first_page = await self._get(
+                path, MoxfieldConnector._binder_params(1, page_size)
+            )
+            if status == 200:
+                self._binder_page_size = page_size
+                break
+            # Only a rejected page size is worth retrying smaller
+            if status != 400:
+                raise Exception("Failed to fetch binder content")
+        else:
+            raise Exception("Failed to fetch binder content")
+
+        # Remaining pages are requested at most MAX_CONCURRENT_PAGES at a time,
+        # as in the blocking connector; gather keeps them in order
+        pages = [first_page]
+        if first_page["totalPages"] > 1 and first_page["data"]:
+            slots = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+
+            async def get_page(page_number: int) -> dict:
+                async with slots:
+                    return await self._get_binder_page(path, page_number, page_size)
+
+            pages += await asyncio.gather(
+                *[
+                    get_page(page_number)
+                    for page_number in range(2, first_page["totalPages"] + 1)
+                ]
+            )
+        return [card for page in pages for card in page["data"]]
+
+    async def fetch_many(
+        self, requests: list[FetchRequest], return_exceptions: bool = False
+    ) -> list[Union[list[dict], Exception]]:
+        """
+        Fetch several decks and binders at once
+        :param requests: decks and binders to load; how many are in flight at a
+            time is bounded by the connection pool
+        :param return_exceptions: put a failed fetch's exception in its slot
+            instead of raising it
+        :return: card lists in the same order as `requests`
+        """
+        return await asyncio.gather(
+            *[
+                (
+                    self.get_binder_content(r.id)
+                    if r.is_binder
+                    else self.get_deck_content(r.id, r.include_sideboard)
+                )
+                for r in requests
+            ],
+            return_exceptions=return_exceptions,
+        )
@@ -0,0 +1,168 @@
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from services.edhrec_extended import EDHRecExtended
+from services.response_cache import ResponseCache
+from services.ttl_cache import TTLCache
+
+# (count, card name) for each line of an average decklist
+DeckRecords = List[Tuple[int, str]]
+
+DEFAULT_TTL = 24 * 60 * 60.0
+
+
+def parse_decklist(decklist: Iterable[str]) -> DeckRecords:
+    """Split EDHREC's "1 Sol Ring" lines into (1, "Sol Ring") records"""
+    records = []
+    for line in decklist:
+        count, name = line.split(" ", 1)
+        records.append((int(count), name))
+    return records
+
+
+class AverageDeckStore:
+    """
+    EDHREC average decklists, kept as compact (count, name) records.
+
+    Decks are served from memory, then from a local SQLite file shared with
+    other processes (see ResponseCache), and only fetched from EDHREC once
+    they are older than the file's TTL, so re-running a commander survey
+    only pays for commanders that are new or expired.
+    """
+
+    def __init__(
+        self,
+        edhrec: EDHRecExtended,
+        cache: Optional[ResponseCache] = None,
+        max_workers: int = 8,
+    ):
+        """
+        :param edhrec: client the decks are fetched with
+        :param cache: persistent store; None keeps decks in memory only
+        :param max_workers: concurrent fetches in `get_average_decks`
+        """
+        self.edhrec = edhrec
+        self.cache = cache
+        self.max_workers = max_workers
+        self._memory = TTLCache(
+            max_entries=2048, ttl=cache.ttl if cache else DEFAULT_TTL
+        )
+
+    @classmethod
+    def from_env(cls, edhrec: EDHRecExtended) -> "AverageDeckStore":
+        """
+        Store persisted at AVERAGE_DECK_CACHE_PATH (default: a file in the
+        system temp dir) with a TTL of AVERAGE_DECK_CACHE_TTL seconds
+        """
+        path = os.environ.get("AVERAGE_DECK_CACHE_PATH") or str(
+            Path(tempfile.gettempdir()) / "edhremixer-average-decks.sqlite3"
+        )
+        ttl = float(os.environ.get("AVERAGE_DECK_CACHE_TTL", DEFAULT_TTL))
+        return cls(edhrec, ResponseCache(path, ttl=ttl))
+
+    @staticmethod
+    def _key(commander_name: str) -> str:
+        return f"average-deck:{commander_name}"
+
+    def _load(self, commander_name: str) -> Tuple[DeckRecords, float]:
+        """Records of a deck and the seconds they stay fresh"""
+        if self.cache is not None:
+            cached = self.cache.get(self._key(commander_name))
+            if cached is not None and cached.fresh:
+                records = [tuple(record) for record in json.loads(cached.body)]
+                # The file's TTL counts from when the deck was fetched
+                return records, self.cache.ttl - cached.age
+
+        average_deck = self.edhrec.get_commanders_average_deck(commander_name)
+        records = parse_decklist(average_deck["decklist"])
+        if self.cache is not None:
+            self.cache.put(
+                self._key(commander_name),
+                json.dumps(records, separators=(",", ":")).encode(),
+            )
+        return records, self._memory.ttl
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters of the in-memory layer"""
+        return self._memory.stats()._asdict()
+
+    def get_average_deck(self, commander_name: str) -> DeckRecords:
+        found, records = self._memory.get(commander_name)
+        if found:
+            return records
+        records, ttl = self._load(commander_name)
+        self._memory.put(commander_name, records, ttl=ttl)
+        return records
+
+    def get_average_decks(
+        self,
+        commander_names: Iterable[str],
+        return_exceptions: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Union[DeckRecords, Exception]]:
+        """
+        Average decks of many commanders, fetching the missing ones concurrently
+        :param commander_names: commanders, duplicates allowed
+        :param return_exceptions: map a commander whose fetch failed to the
+            exception instead of raising it
+        :param max_workers: concurrent fetches, defaults to the store's
+        :return: records per commander
+        """
+        commander_names = list(dict.fromkeys(commander_names))
+        with ThreadPoolExecutor(max_workers or self.max_workers) as executor:
+            futures = {
+                name: executor.submit(self.get_average_deck, name)
+                for name in commander_names
+            }
+
+        decks = {}
+        for name, future in futures.items():
+            error = future.exception()
+            if error is not None and not return_exceptions:
+                raise error
+            decks[name] = error if error is not None else future.result()
+        return decks
+
+    def iter_average_decks(
+        self,
+        commander_names: Iterable[str],
+        max_workers: Optional[int] = None,
+        window: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Union[DeckRecords, Exception]]]:
+        """
+        Yield (commander, records or exception) as soon as each deck is ready.
+
+        At most `window` decks are being fetched or waiting to be consumed, and
+        a new fetch only starts once the caller takes a result, so a slow
+        consumer (e.g. a client reading a stream slowly) slows the fetching down
+        instead of piling results up in memory.
+        :param commander_names: commanders, duplicates allowed
+        :param max_workers: concurrent fetches, defaults to the store's
+        :param window: defaults to twice `max_workers`
+        """
+        names = iter(dict.fromkeys(commander_names))
+        max_workers = max_workers or self.max_workers
+        executor = ThreadPoolExecutor(max_workers)
+        pending = {}
+
+        def submit(count: int):
+            for name in islice(names, count):
+                pending[executor.submit(self.get_average_deck, name)] = name
+
+        try:
+            submit(window or 2 * max_workers)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = pending.pop(future)
+                    error = future.exception()
+                    yield name, error if error is not None else future.result()
+                    submit(1)
+        finally:
+            # The consumer may stop early; don't start the remaining fetches
+            executor.shutdown(wait=False, cancel_futures=True)
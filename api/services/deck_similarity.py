@@ -0,0 +1,95 @@
+from typing import Dict, Sequence, Set, Tuple
+
+import numpy as np
+
+# Rows of the incidence matrix multiplied at once; bounds the intersection
+# block held in memory to BLOCK_ROWS x number of decks
+BLOCK_ROWS = 512
+
+
+def incidence_matrix(decks: Sequence[Set[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Decks x cards 0/1 matrix over the cards found in at least two decks, and
+    the size of every deck.
+
+    Cards that only one deck plays never add to an intersection, so they are
+    left out of the matrix and only counted in the deck sizes.
+    """
+    sizes = np.array([len(deck) for deck in decks], dtype=np.int64)
+    counts: Dict[str, int] = {}
+    for deck in decks:
+        for card in deck:
+            counts[card] = counts.get(card, 0) + 1
+    shared = {}
+    for card, count in counts.items():
+        if count > 1:
+            shared[card] = len(shared)
+
+    # float32 keeps the products on BLAS and counts exact up to 2**24
+    matrix = np.zeros((len(decks), len(shared)), dtype=np.float32)
+    for row, deck in enumerate(decks):
+        columns = [shared[card] for card in deck if card in shared]
+        matrix[row, columns] = 1.0
+    return matrix, sizes
+
+
+def jaccard_matrix(decks: Sequence[Set[str]]) -> np.ndarray:
+    """
+    Pairwise Jaccard similarity of the decks' card sets.
+
+    All intersections come from matrix products of the incidence matrix with
+    itself, computed block by block for the upper triangle only and mirrored;
+    unions follow from the deck sizes. As in calculate_deck_similarity, a pair
+    involving an empty deck scores 0, and the diagonal is 1.
+    """
+    n = len(decks)
+    matrix, sizes = incidence_matrix(decks)
+    similarity = np.zeros((n, n), dtype=np.float64)
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        intersections = matrix[start:stop] @ matrix[start:].T
+        unions = sizes[start:stop, None] + sizes[None, start:] - intersections
+        with np.errstate(divide="ignore", invalid="ignore"):
+            block = np.where(unions > 0, intersections / unions, 0.0)
+        similarity[start:stop, start:] = block
+
+    upper = np.triu(similarity, k=1)
+    similarity = upper + upper.T
+    np.fill_diagonal(similarity, 1.0)
+    return similarity
+
+
+def upper_triangle(similarity: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Similarities of the distinct pairs (i < j), with their row and column
+    indices, so the extremes can be located without listing the pairs
+    """
+    rows, columns = np.triu_indices(len(similarity), k=1)
+    return similarity[rows, columns], rows, columns
+
+
+def jaccard_rows(decks: Sequence[Set[str]], others: Sequence[Set[str]]) -> np.ndarray:
+    """
+    Jaccard similarity of each of `decks` with each of `others`, as a
+    len(decks) x len(others) matrix.
+
+    Only the cards of `decks` are encoded, so adding a few decks to a large
+    collection costs a few rows, not the whole matrix.
+    """
+    columns: Dict[str, int] = {}
+    for deck in decks:
+        for card in deck:
+            columns.setdefault(card, len(columns))
+
+    def encode(card_sets: Sequence[Set[str]]) -> np.ndarray:
+        matrix = np.zeros((len(card_sets), len(columns)), dtype=np.float32)
+        for row, deck in enumerate(card_sets):
+            matrix[row, [columns[card] for card in deck if card in columns]] = 1.0
+        return matrix
+
+    sizes = np.array([len(deck) for deck in decks], dtype=np.int64)
+    other_sizes = np.array([len(deck) for deck in others], dtype=np.int64)
+    intersections = encode(decks) @ encode(others).T
+    unions = sizes[:, None] + other_sizes[None, :] - intersections
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(unions > 0, intersections / unions, 0.0)
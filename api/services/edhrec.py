@@ -1,7 +1,15 @@
+import threading
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from services.average_deck_store import AverageDeckStore, DeckRecords
 from services.edhrec_extended import EDHRecExtended
 from pydantic import BaseModel
 
 edhrec = EDHRecExtended()
+_average_deck_store: Optional[AverageDeckStore] = None
+_average_deck_store_lock = threading.Lock()
+
+BASIC_LANDS = {"Plains", "Island", "Swamp", "Mountain", "Forest"}
 
 
 class Card(BaseModel):
@@ -15,20 +23,88 @@ class Deck(BaseModel):
     cards: list[Card]
 
 
-def get_average_deck(commander_name: str) -> Deck:
-    average_deck = edhrec.get_commanders_average_deck(commander_name)
-    basics = ["Plains", "Island", "Swamp", "Mountain", "Forest"]
+def get_average_deck_store() -> AverageDeckStore:
+    """
+    Shared average-deck store, opened on first use so that importing this
+    module does not create its database file.
+    """
+    global _average_deck_store
+    with _average_deck_store_lock:
+        if _average_deck_store is None:
+            _average_deck_store = AverageDeckStore.from_env(edhrec)
+        return _average_deck_store
+
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hit/miss/eviction counters of every EDHREC lookup cache"""
+    return {
+        **edhrec.cache_stats(),
+        "average_deck": get_average_deck_store().cache_stats(),
+    }
+
+
+def _to_deck(commander_name: str, records: DeckRecords) -> Deck:
     cards = [
-        Card(
-            count=card.split(" ", 1)[0],
-            name=card.split(" ", 1)[1],
-            basic_land=card.split(" ", 1)[1] in basics,
-        )
-        for card in average_deck["decklist"]
+        Card(count=str(count), name=name, basic_land=name in BASIC_LANDS)
+        for count, name in records
     ]
     return Deck(name=commander_name, cards=cards)
 
 
+def get_average_deck(commander_name: str) -> Deck:
+    return _to_deck(
+        commander_name, get_average_deck_store().get_average_deck(commander_name)
+    )
+
+
+def get_average_decks(
+    commander_names: Iterable[str],
+    return_exceptions: bool = False,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Union[Deck, Exception]]:
+    """
+    Get the average decks of many commanders, fetching uncached ones concurrently.
+
+    Args:
+        commander_names: Names of the commanders
+        return_exceptions: Map commanders whose fetch failed to the exception
+            instead of raising it
+        max_workers: Concurrent fetches, defaults to the store's
+
+    Returns:
+        Dictionary from each commander name to its deck (or exception)
+    """
+    decks = get_average_deck_store().get_average_decks(
+        commander_names, return_exceptions=return_exceptions, max_workers=max_workers
+    )
+    return {
+        name: records if isinstance(records, Exception) else _to_deck(name, records)
+        for name, records in decks.items()
+    }
+
+
+def iter_average_decks(
+    commander_names: Iterable[str], max_workers: Optional[int] = None
+) -> Iterator[Tuple[str, Union[Deck, Exception]]]:
+    """
+    Yield the average decks of many commanders as soon as each one is ready.
+
+    Args:
+        commander_names: Names of the commanders
+        max_workers: Concurrent fetches, defaults to the store's
+
+    Yields:
+        (commander name, deck or the exception its fetch raised)
+    """
+    for name, records in get_average_deck_store().iter_average_decks(
+        commander_names, max_workers=max_workers
+    ):
+        if isinstance(records, Exception):
+            yield name, records
+        else:
+            yield name, _to_deck(name, records)
+
+
 def get_card_overall_inclusion(card_name: str) -> dict:
     """
     Get the overall inclusion percentage for a card across all Commander decks.
@@ -42,6 +118,22 @@ def get_card_overall_inclusion(card_name: str) -> dict:
     return edhrec.get_overall_card_inclusion(card_name)
 
 
+def get_cards_overall_inclusion(
+    card_names: Iterable[str], timeout: Optional[float] = None
+) -> Dict[str, Optional[dict]]:
+    """
+    Get the overall inclusion percentage of many cards concurrently.
+
+    Args:
+        card_names: Names of the cards, duplicates and "A // B" names allowed
+        timeout: Seconds to spend fetching; cards not resolved by then are None
+
+    Returns:
+        Dictionary from each card name to its inclusion data or None
+    """
+    return edhrec.get_overall_card_inclusions(card_names, timeout=timeout)
+
+
 def get_card_commander_inclusion(card_name: str, commander_name: str) -> dict:
     """
     Get the inclusion percentage for a card in a specific commander's decks.
@@ -53,19 +145,26 @@ def get_card_commander_inclusion(card_name: str, commander_name: str) -> dict:
     Returns:
         Dictionary with commander-specific inclusion data or None if not found
     """
-    commander_cards = edhrec.get_commander_cards(commander_name)
-
-    for category, cards in commander_cards.items():
-        for card in cards:
-            if card["name"] == card_name:
-                inclusion_percent = (card["num_decks"] / card["potential_decks"]) * 100
-                return {
-                    "card_name": card["name"],
-                    "commander": commander_name,
-                    "category": category,
-                    "inclusion_percentage": round(inclusion_percent, 2),
-                    "num_decks": card["num_decks"],
-                    "potential_decks": card["potential_decks"],
-                    "synergy": card["synergy"],
-                }
-    return None
+    stats = edhrec.get_commander_card_stats(card_name, commander_name)
+    return {"card_name": card_name, **stats} if stats else None
+
+
+def get_cards_commander_inclusion(
+    card_names: Iterable[str], commander_name: str
+) -> Dict[str, Optional[dict]]:
+    """
+    Get the inclusion percentage of many cards in a specific commander's decks,
+    from a single read of the commander's page.
+
+    Args:
+        card_names: Names of the cards
+        commander_name: Name of the commander
+
+    Returns:
+        Dictionary from each card name to its commander-specific inclusion
+        data or None
+    """
+    return {
+        card_name: get_card_commander_inclusion(card_name, commander_name)
+        for card_name in card_names
+    }
@@ -6,12 +6,87 @@ for cards across all Commander decks, not just for specific commanders.
 """
 
 import re
-import time
-from typing import Optional, Dict
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, Dict, Iterable, List, Tuple
 import requests
 from bs4 import BeautifulSoup
 from pyedhrec import EDHRec
 
+from services.retry_policy import CircuitOpenError, retry_policy
+from services.ttl_cache import TTLCache
+
+EDHREC_JSON_PAGES_URL = "https://json.edhrec.com/pages"
+# Consecutive JSON card pages without usable counts before the JSON path is
+# given up on; a payload without the card object gives it up at once
+JSON_PAGE_FAILURE_LIMIT = 20
+
+# "83.8% inclusion 6.45M decks 7.70M decks" in the text of an HTML card page
+INCLUSION_TEXT_PATTERN = re.compile(
+    r"([\d.]+)%\s*inclusion\s*([\d.]+[MK]?)\s*decks\s*([\d.]+[MK]?)\s*decks"
+)
+
+InclusionCounts = Tuple[float, str, str]
+
+
+def card_slug(card_name: str) -> str:
+    """
+    EDHREC URL slug of a card, computed locally.
+
+    Uses the front face of double-faced cards and drops accents and
+    punctuation, e.g. "Circle of Protection: Red" -> "circle-of-protection-red".
+    """
+    name = card_name.split(" // ")[0].strip()
+    name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    name = re.sub(r"[^a-z0-9 -]", "", name.lower())
+    return re.sub(r"[\s-]+", "-", name).strip("-")
+
+
+def format_deck_count(count: int) -> str:
+    """Inverse of `parse_deck_count`, in EDHREC's "6.45M" / "170K" style"""
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.2f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.0f}K"
+    return str(count)
+
+
+def inclusion_json_card(payload) -> Optional[dict]:
+    """The `container.json_dict.card` object of a json.edhrec.com card page"""
+    if not isinstance(payload, dict):
+        return None
+    card = ((payload.get("container") or {}).get("json_dict") or {}).get("card")
+    return card if isinstance(card, dict) else None
+
+
+def parse_inclusion_json(payload: dict) -> Optional[InclusionCounts]:
+    """
+    Inclusion counts from a json.edhrec.com card page, None if absent (e.g.
+    a card no deck plays yet has no potential decks)
+    """
+    card = inclusion_json_card(payload) or {}
+    num_decks = card.get("num_decks", card.get("inclusion"))
+    total_decks = card.get("potential_decks")
+    if not isinstance(num_decks, int) or not isinstance(total_decks, int):
+        return None
+    if not total_decks:
+        return None
+    return (
+        round(num_decks / total_decks * 100, 1),
+        format_deck_count(num_decks),
+        format_deck_count(total_decks),
+    )
+
+
+def parse_inclusion_html(content: bytes) -> Optional[InclusionCounts]:
+    """Inclusion counts from the text of an EDHREC HTML card page, None if absent"""
+    page_text = BeautifulSoup(content, "html.parser").get_text()
+    match = INCLUSION_TEXT_PATTERN.search(page_text)
+    if match:
+        return float(match.group(1)), match.group(2), match.group(3)
+    return None
+
 
 class EDHRecExtended(EDHRec):
     """
@@ -20,15 +95,104 @@ class EDHRecExtended(EDHRec):
 
     def __init__(self):
         super().__init__()
-        self._cache = {}  # Cache for inclusion data
-        self._last_request_time = 0  # For rate limiting
+        # Bounded replacements for pyedhrec's per-method caches, which never
+        # drop an entry. Misses and failures are kept for 10 minutes only.
+        self._cache = TTLCache(max_entries=20_000)  # Overall inclusion per card
+        self._commander_data_cache = TTLCache(max_entries=256)
+        self._commander_index_cache = TTLCache(max_entries=256)
+        # Cleared if json.edhrec.com stops carrying the inclusion counts
+        self._use_json_pages = True
+        self._json_page_failures = 0
+        # Lookups run on get_overall_card_inclusions' worker threads
+        self._json_page_lock = threading.Lock()
+
+    def _get(self, uri: str, query_params: dict = None, return_type: str = "json"):
+        """pyedhrec's request helper, run under the shared retry policy"""
+        response = retry_policy.call(
+            uri, lambda: self.session.get(uri, params=query_params, timeout=10)
+        )
+        response.raise_for_status()
+        if return_type == "json":
+            return response.json()
+        return response.content
+
+    def get_commander_data(self, card_name: str) -> dict:
+        """
+        Commander page data, which every `get_commander_cards`-style lookup
+        reads its card lists from.
+        """
+
+        def load():
+            commander_uri, params = self._build_nextjs_uri("commanders", card_name)
+            return self._get_nextjs_data(self._get(commander_uri, query_params=params))
+
+        return self._commander_data_cache.get_or_load(card_name, load)
+
+    def get_commanders_average_deck(self, card_name: str, budget: str = None) -> dict:
+        """
+        Average decklist of a commander, optionally its budget/expensive variant.
+
+        Not cached here: AverageDeckStore keeps the decks as compact records.
+        """
+        uri, params = self._build_nextjs_uri("average-decks", card_name, budget=budget)
+        data = self._get_nextjs_data(self._get(uri, query_params=params))
+        return {"commander": card_name, "decklist": data.get("deck")}
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss/eviction counters of each lookup cache"""
+        return {
+            "overall_inclusion": self._cache.stats()._asdict(),
+            "commander_data": self._commander_data_cache.stats()._asdict(),
+            "commander_card_index": self._commander_index_cache.stats()._asdict(),
+        }
+
+    def _get_inclusion_json(self, slug: str) -> Optional[InclusionCounts]:
+        """
+        Inclusion counts from the card's json.edhrec.com page, None when the
+        caller should read the HTML page instead.
+
+        A request that fails, or a page without counts, only sends this card
+        to the HTML page. The JSON path is turned off for the process once a
+        page comes back without its card object, or after
+        JSON_PAGE_FAILURE_LIMIT pages in a row without counts.
+        """
+        json_url = f"{EDHREC_JSON_PAGES_URL}/cards/{slug}.json"
+        try:
+            response = retry_policy.call(
+                json_url, lambda: self.session.get(json_url, timeout=10)
+            )
+            if response.status_code != 200:
+                return None
+            payload = response.json()
+        except (requests.RequestException, CircuitOpenError, ValueError) as e:
+            print(f"JSON page unavailable for '{slug}': {e}. Using the HTML page...")
+            return None
+
+        counts = parse_inclusion_json(payload)
+        with self._json_page_lock:
+            if counts is not None:
+                self._json_page_failures = 0
+                return counts
+
+            self._json_page_failures += 1
+            if self._use_json_pages and (
+                inclusion_json_card(payload) is None
+                or self._json_page_failures >= JSON_PAGE_FAILURE_LIMIT
+            ):
+                # The payload changed shape; stop paying for it
+                print(
+                    "json.edhrec.com card pages changed format; using HTML pages only"
+                )
+                self._use_json_pages = False
+        return None
 
     def get_overall_card_inclusion(self, card_name: str) -> Optional[Dict]:
         """
         Get the overall inclusion percentage for a card across all Commander decks.
 
-        This scrapes the EDHRec card page to extract the overall inclusion data
-        that appears at the top of each card page.
+        Reads the counts from the card's JSON page on json.edhrec.com, falling
+        back to the overall inclusion shown at the top of the HTML card page
+        (see `parse_inclusion_html`).
 
         Args:
             card_name: Name of the card (e.g., "Sol Ring")
@@ -50,75 +214,181 @@ class EDHRecExtended(EDHRec):
             >>> print(f"{data['card_name']}: {data['inclusion_percentage']}%")
             Sol Ring: 83.8%
         """
-        # Check cache first
-        if card_name in self._cache:
-            return self._cache[card_name]
-
-        # Rate limiting - wait at least 0.1 seconds between requests
-        time_since_last = time.time() - self._last_request_time
-        if time_since_last < 0.1:
-            time.sleep(0.1 - time_since_last)
+        # Check cache first; spellings of the same card share an entry
+        slug = card_slug(card_name)
+        found, cached = self._cache.get(slug)
+        if found:
+            return cached
 
         try:
-            # Handle double-sided cards - only use the first part for URL
-            card_name_for_url = card_name.split(" // ")[0].strip()
-
-            # Get the card URL using the parent class method
-            card_url = self.get_card_link(card_name_for_url)
-
-            full_url = (
-                card_url
-                if card_url.startswith("http")
-                else f"https://edhrec.com{card_url}"
-            )
-
-            # Fetch the page
-            response = requests.get(full_url, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "html.parser")
-            page_text = soup.get_text()
-
-            # Look for the pattern: "XX.X%inclusionX.XXM decksX.XXM decks"
-            # The format is: percentage% inclusion num_decks decks total_decks decks
-            inclusion_pattern = (
-                r"([\d.]+)%\s*inclusion\s*([\d.]+[MK]?)\s*decks\s*([\d.]+[MK]?)\s*decks"
-            )
-            match = re.search(inclusion_pattern, page_text)
+            page_url = f"https://edhrec.com/cards/{slug}"
+            counts = None
+
+            # Structured payload first: a few KB of JSON instead of the page
+            if self._use_json_pages:
+                counts = self._get_inclusion_json(slug)
+
+            if counts is None:
+                response = retry_policy.call(
+                    page_url,
+                    lambda: self.session.get(
+                        page_url, headers={"Accept": "text/html"}, timeout=10
+                    ),
+                )
+                response.raise_for_status()
+                counts = parse_inclusion_html(response.content)
 
-            if match:
+            if counts:
+                percentage, num_decks, total_decks = counts
                 result = {
                     "card_name": card_name,
-                    "inclusion_percentage": float(match.group(1)),
-                    "num_decks": match.group(2),
-                    "total_decks": match.group(3),
-                    "url": full_url,
+                    "inclusion_percentage": percentage,
+                    "num_decks": num_decks,
+                    "total_decks": total_decks,
+                    "url": page_url,
                 }
-                self._cache[card_name] = result  # Cache the result
-                self._last_request_time = time.time()
+                self._cache.put(slug, result)  # Cache the result
                 return result
             else:
                 print(
                     f"Warning: Could not find inclusion data for '{card_name}'. Continuing..."
                 )
-                self._cache[card_name] = None  # Cache None to avoid retrying
-                self._last_request_time = time.time()
+                self._cache.put(slug, None)  # Don't retry for a while
                 return None
 
+        except CircuitOpenError as e:
+            # EDHREC is failing right now; don't remember the miss
+            print(f"Skipping '{card_name}': {e}. Continuing...")
+            return None
         except requests.RequestException as e:
             print(
                 f"Error fetching data from EDHRec for '{card_name}': {e}. Continuing..."
             )
-            self._cache[card_name] = None  # Cache None to avoid retrying
-            self._last_request_time = time.time()
+            self._cache.put(slug, None)  # Don't retry for a while
             return None
         except Exception as e:
             print(
                 f"Unexpected error getting inclusion for '{card_name}': {e}. Continuing..."
             )
-            self._cache[card_name] = None  # Cache None to avoid retrying
-            self._last_request_time = time.time()
+            self._cache.put(slug, None)  # Don't retry for a while
+            return None
+
+    def get_overall_card_inclusions(
+        self,
+        card_names: Iterable[str],
+        max_workers: int = 8,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Optional[Dict]]:
+        """
+        Overall inclusion of many cards at once.
+
+        Names are de-duplicated by slug, so "Fire // Ice", "Fire" and "fire"
+        are looked up once. Cached cards are answered immediately and the rest
+        are fetched concurrently; the shared rate limiter keeps the fan-out
+        within EDHREC's budget.
+
+        Args:
+            card_names: Card names as they appear in decks
+            max_workers: Concurrent page fetches
+            timeout: Seconds to wait for the fetches; cards still pending
+                afterwards map to None (their fetches finish in the
+                background and land in the cache)
+
+        Returns:
+            Dictionary from each given name to its `get_overall_card_inclusion`
+            result, or None
+        """
+        names_by_slug: Dict[str, List[str]] = {}
+        for name in card_names:
+            names_by_slug.setdefault(card_slug(name), []).append(name)
+
+        by_slug: Dict[str, Optional[Dict]] = {}
+        misses = []
+        for slug, names in names_by_slug.items():
+            found, cached = self._cache.get(slug)
+            if found:
+                by_slug[slug] = cached
+            else:
+                misses.append((slug, names[0]))
+
+        if misses:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            futures = {
+                executor.submit(self.get_overall_card_inclusion, name): slug
+                for slug, name in misses
+            }
+            done, _ = wait(futures, timeout=timeout)
+            # Drop the queued lookups; running ones finish on their own
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future in done:
+                by_slug[futures[future]] = future.result()
+
+        return {
+            name: by_slug.get(slug)
+            for slug, names in names_by_slug.items()
+            for name in names
+        }
+
+    def get_commander_card_index(self, commander_name: str) -> Dict[str, Dict]:
+        """
+        Commander-specific stats of every card on a commander's page, by name.
+
+        Built once per commander page fetch and cached, so looking up many
+        cards for one commander is a dictionary access each instead of a
+        refetch and a scan of every category.
+
+        Args:
+            commander_name: Name of the commander
+
+        Returns:
+            Dictionary from card name to its 'category', 'num_decks',
+            'potential_decks' and 'synergy' (first category listing the card
+            with deck counts; 'synergy' is None when EDHREC omits it)
+        """
+
+        def build():
+            index = {}
+            for category, cards in self.get_commander_cards(commander_name).items():
+                for card in cards:
+                    name = card.get("name")
+                    num_decks = card.get("num_decks")
+                    potential_decks = card.get("potential_decks")
+                    # An incomplete row is left out rather than failing every
+                    # lookup for this commander
+                    if name is None or num_decks is None or not potential_decks:
+                        continue
+                    index.setdefault(
+                        name,
+                        {
+                            "category": category,
+                            "num_decks": num_decks,
+                            "potential_decks": potential_decks,
+                            "synergy": card.get("synergy"),
+                        },
+                    )
+            return index
+
+        return self._commander_index_cache.get_or_load(commander_name, build)
+
+    def get_commander_card_stats(
+        self, card_name: str, commander_name: str
+    ) -> Optional[Dict]:
+        """
+        Inclusion of a card in a commander's decks, None if the commander page
+        does not list it.
+        """
+        card = self.get_commander_card_index(commander_name).get(card_name)
+        if card is None:
             return None
+        inclusion_percent = (card["num_decks"] / card["potential_decks"]) * 100
+        return {
+            "commander": commander_name,
+            "category": card["category"],
+            "inclusion_percentage": round(inclusion_percent, 2),
+            "num_decks": card["num_decks"],
+            "potential_decks": card["potential_decks"],
+            "synergy": card["synergy"],
+        }
 
     def get_card_full_stats(
         self, card_name: str, commander_name: Optional[str] = None
@@ -133,37 +403,57 @@ class EDHRecExtended(EDHRec):
         Returns:
             Dictionary with both overall and commander-specific data (if commander provided)
         """
-        result = {
-            "card_name": card_name,
-            "overall": self.get_overall_card_inclusion(card_name),
-            "commander_specific": None,
-        }
+        return self.get_cards_full_stats([card_name], commander_name)[card_name]
+
+    def get_cards_full_stats(
+        self,
+        card_names: Iterable[str],
+        commander_name: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Dict]:
+        """
+        `get_card_full_stats` for many cards at once.
+
+        The commander page is fetched (or read from cache) once, alongside the
+        batched overall inclusion lookups.
+
+        Args:
+            card_names: Names of the cards
+            commander_name: Optional commander name for commander-specific stats
+            timeout: Seconds to spend on the overall inclusion lookups, see
+                `get_overall_card_inclusions`
 
-        if commander_name:
-            # Get commander-specific data
-            try:
-                commander_cards = self.get_commander_cards(commander_name)
-                for category, cards in commander_cards.items():
-                    for card in cards:
-                        if card["name"] == card_name:
-                            inclusion_percent = (
-                                card["num_decks"] / card["potential_decks"]
-                            ) * 100
-                            result["commander_specific"] = {
-                                "commander": commander_name,
-                                "category": category,
-                                "inclusion_percentage": round(inclusion_percent, 2),
-                                "num_decks": card["num_decks"],
-                                "potential_decks": card["potential_decks"],
-                                "synergy": card["synergy"],
-                            }
-                            break
-                    if result["commander_specific"]:
-                        break
-            except Exception as e:
-                print(f"Error getting commander-specific data: {e}")
-
-        return result
+        Returns:
+            Dictionary from each card name to its full stats
+        """
+        card_names = list(card_names)
+        commander_index = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if commander_name:
+                commander_index = executor.submit(
+                    self.get_commander_card_index, commander_name
+                )
+            overall = self.get_overall_card_inclusions(card_names, timeout=timeout)
+
+            if commander_index is not None:
+                try:
+                    commander_index.result()
+                except Exception as e:
+                    print(f"Error getting commander-specific data: {e}")
+                    commander_index = None
+
+        return {
+            card_name: {
+                "card_name": card_name,
+                "overall": overall[card_name],
+                "commander_specific": (
+                    self.get_commander_card_stats(card_name, commander_name)
+                    if commander_index is not None
+                    else None
+                ),
+            }
+            for card_name in card_names
+        }
 
 
 def parse_deck_count(deck_str: str) -> int:
@@ -1,8 +1,15 @@
-from services.edhrec import get_average_deck
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
+
+from services.completion_index import CompletionIndex
+from services.edhrec import (
+    Deck,
+    get_average_deck,
+    get_average_decks,
+    iter_average_decks,
+)
 
 # Add the api directory to the path so we can import the moxfield connector
-from services.moxfield_connector import MoxfieldConnector
+from services.moxfield_connector import MoxfieldConnector, FetchRequest
 
 
 def get_my_collection(binder_ids: list[str]) -> tuple[set[str], list[dict]]:
@@ -13,10 +20,11 @@ def get_my_collection(binder_ids: list[str]) -> tuple[set[str], list[dict]]:
     collection = set()
     all_cards_data = []
 
-    for binder_id in binder_ids:
-        print(f"Fetching binder: {binder_id}")
-        cards = MoxfieldConnector.get_binder_content(binder_id)
+    contents = MoxfieldConnector().fetch_many(
+        [FetchRequest(id=binder_id, is_binder=True) for binder_id in binder_ids]
+    )
 
+    for cards in contents:
         for card in cards:
             # Get the card name from the binder response
             card_name = card.get("card", {}).get("name", "")
@@ -26,9 +34,6 @@ def get_my_collection(binder_ids: list[str]) -> tuple[set[str], list[dict]]:
             # Store full card data for filtering legendary creatures later
             all_cards_data.append(card)
 
-        print(f"  Added {len(cards)} cards")
-
-    print(f"\nTotal unique cards in collection: {len(collection)}")
     return collection, all_cards_data
 
 
@@ -51,37 +56,45 @@ def get_legendary_creatures(cards_data: list[dict]) -> list[str]:
     return sorted(list(legendary_creatures))
 
 
-def analyze_commander(commander_name: str, my_collection: set[str]) -> dict:
+def completion_result(
+    commander_name: str, average_deck: Deck, my_collection: set[str]
+) -> dict:
     """
-    Analyze a single commander against your collection.
-    Returns simplified results with just the key metrics.
+    Key metrics of how much of a commander's average deck is in your collection.
     """
-    try:
-        average_deck = get_average_deck(commander_name)
+    owned_count = 0
+    total_count = 0
 
-        owned_count = 0
-        total_count = 0
+    for card in average_deck.cards:
+        if card.basic_land:
+            continue
 
-        for card in average_deck.cards:
-            if card.basic_land:
-                continue
+        total_count += 1
+        if card.name in my_collection:
+            owned_count += 1
 
-            total_count += 1
-            if card.name in my_collection:
-                owned_count += 1
+    completion_percentage = (
+        round(owned_count / total_count * 100, 2) if total_count > 0 else 0
+    )
 
-        completion_percentage = (
-            round(owned_count / total_count * 100, 2) if total_count > 0 else 0
-        )
+    return {
+        "commander": commander_name,
+        "total_cards": total_count,
+        "owned_count": owned_count,
+        "missing_count": total_count - owned_count,
+        "completion_percentage": completion_percentage,
+        "success": True,
+    }
 
-        return {
-            "commander": commander_name,
-            "total_cards": total_count,
-            "owned_count": owned_count,
-            "missing_count": total_count - owned_count,
-            "completion_percentage": completion_percentage,
-            "success": True,
-        }
+
+def analyze_commander(commander_name: str, my_collection: set[str]) -> dict:
+    """
+    Analyze a single commander against your collection.
+    Returns simplified results with just the key metrics.
+    """
+    try:
+        average_deck = get_average_deck(commander_name)
+        return completion_result(commander_name, average_deck, my_collection)
     except Exception as e:
         return {"commander": commander_name, "error": str(e), "success": False}
 
@@ -126,43 +139,85 @@ def find_missing_cards(commander_name: str, my_collection: set[str]) -> dict:
     }
 
 
+def build_completion_index(
+    commanders: list[str], max_workers: int = 10
+) -> tuple[CompletionIndex, list[dict]]:
+    """
+    Index the non-basic cards of each commander's average deck so the
+    commanders can be re-ranked against any collection without refetching.
+    Returns the index and a failed result for each deck that could not be fetched.
+    """
+    decks = get_average_decks(
+        commanders, return_exceptions=True, max_workers=max_workers
+    )
+    failures = [
+        {"commander": commander, "error": str(deck), "success": False}
+        for commander, deck in decks.items()
+        if isinstance(deck, Exception)
+    ]
+    index = CompletionIndex(
+        {
+            commander: [card.name for card in deck.cards if not card.basic_land]
+            for commander, deck in decks.items()
+            if not isinstance(deck, Exception)
+        }
+    )
+    return index, failures
+
+
 def analyze_commanders_parallel(
     commanders: list[str], my_collection: set[str], max_workers: int = 10
 ) -> list[dict]:
     """
-    Analyze multiple commanders in parallel using ThreadPoolExecutor.
+    Analyze multiple commanders, fetching their average decks concurrently
+    and ranking them all at once through a CompletionIndex.
     """
-    results = []
+    index, failures = build_completion_index(commanders, max_workers=max_workers)
+    results = index.rank(my_collection)
+
+    for result in results:
+        print(
+            f"✓ Analyzed: {result['commander']} ({result['completion_percentage']}% owned)"
+        )
+    for result in failures:
+        print(f"✗ Failed: {result['commander']} - {result['error']}")
+
+    return results + failures
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_commander = {
-            executor.submit(analyze_commander, commander, my_collection): commander
-            for commander in commanders
-        }
 
-        # Process completed tasks as they finish
-        for future in as_completed(future_to_commander):
-            commander = future_to_commander[future]
-            try:
-                result = future.result()
-                results.append(result)
-
-                if result["success"]:
-                    print(
-                        f"✓ Analyzed: {commander} ({result['completion_percentage']}% owned)"
-                    )
-                else:
-                    print(
-                        f"✗ Failed: {commander} - {result.get('error', 'Unknown error')}"
-                    )
-            except Exception as e:
-                print(f"✗ Exception for {commander}: {str(e)}")
-                results.append(
-                    {"commander": commander, "error": str(e), "success": False}
-                )
-
-    return results
+def iter_commander_analysis(
+    binder_ids: list[str], max_workers: int = 10
+) -> Iterator[tuple[str, dict]]:
+    """
+    Analyze every legendary creature of the given binders, yielding
+    (event, data) pairs as the work progresses:
+      - "start": number of commanders and collection size
+      - "result": one commander's completion (or error), as soon as its
+        average deck is fetched
+      - "summary": successful results sorted by completion, then failures
+    """
+    my_collection, all_cards_data = get_my_collection(binder_ids)
+    commanders = get_legendary_creatures(all_cards_data)
+    yield "start", {
+        "commanders": len(commanders),
+        "collection_size": len(my_collection),
+    }
+
+    results = []
+    for commander, deck in iter_average_decks(commanders, max_workers=max_workers):
+        if isinstance(deck, Exception):
+            result = {"commander": commander, "error": str(deck), "success": False}
+        else:
+            result = completion_result(commander, deck, my_collection)
+        results.append(result)
+        yield "result", result
+
+    successful_results = [r for r in results if r["success"]]
+    successful_results.sort(key=lambda x: x["completion_percentage"], reverse=True)
+    yield "summary", {
+        "results": successful_results,
+        "failed": [r for r in results if not r["success"]],
+    }
 
 
 if __name__ == "__main__":
@@ -173,7 +228,9 @@ if __name__ == "__main__":
     print("=" * 60)
     print("Fetching your collection from Moxfield...")
     print("=" * 60)
+    print(f"Fetching binders: {', '.join(binder_ids)}")
     my_collection, all_cards_data = get_my_collection(binder_ids)
+    print(f"\nTotal unique cards in collection: {len(my_collection)}")
 
     # Find all legendary creatures in the collection
     print("\n" + "=" * 60)
@@ -0,0 +1,203 @@
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from models import Collection, Movement
+
+
+class FlowAllocator:
+    """
+    Allocates every card in one pass as a min-cost flow over the network
+    source collection -> uniqueCardId -> target collection.
+
+    Each source -> card edge carries at most the copies the source holds and each
+    card -> target edge at most the copies the target needs. Shipping a copy
+    costs less the higher the priority of its source and target. Because those
+    costs sit on the collection side of the card nodes, the min-cost maximum flow
+    splits per card: the card's flow is min(supply, demand), drawn from the
+    highest priority tiers of sources and delivered to the highest priority tiers
+    of targets. That fixes how many copies each priority tier gives or receives,
+    but not which collection in a tier does, nor how sources pair with targets.
+
+    The flow is then decomposed into movements by repeatedly committing the
+    source -> target pair with the largest priority-weighted volume: the copies
+    it can carry within those tier budgets, times the combined priority of the
+    pair (shifted so the lowest priorities weigh 1). Uncapped, every copy the
+    greedy moves is moved, with the same per-tier totals; the number of
+    movements is about the same as the greedy's, not smaller.
+
+    `max_moves` caps the number of distinct source -> target movements. The
+    first `max_moves` pairs by weighted volume are kept, so the cap favours
+    the high-priority collections; copies they cannot carry are left
+    unallocated.
+    """
+
+    def __init__(
+        self,
+        available_counters: Dict[Collection, Counter],
+        required_counters: Dict[Collection, Counter],
+        max_moves: Optional[int] = None,
+    ):
+        if max_moves is not None and max_moves < 1:
+            raise ValueError("max_moves must be at least 1")
+
+        self.available_counters = available_counters
+        self.required_counters = required_counters
+        self.max_moves = max_moves
+
+        # Highest priority first, input order among equals (same as the greedy)
+        self.sources: List[Collection] = sorted(
+            available_counters, key=lambda c: c.priority, reverse=True
+        )
+        self.targets: List[Collection] = sorted(
+            required_counters, key=lambda c: c.priority, reverse=True
+        )
+
+    @staticmethod
+    def _tier_budgets(
+        entries: List[Tuple[Collection, int]], quantity: int
+    ) -> Dict[int, int]:
+        """Copies each priority tier gives or receives so the best tiers carry `quantity`"""
+        budgets = defaultdict(int)
+        for collection, count in entries:
+            take = min(count, quantity)
+            if take == 0:
+                break
+            budgets[collection.priority] += take
+            quantity -= take
+        return budgets
+
+    def _build_network(self):
+        """Per-card residual capacities and tier budgets, plus the cards each pair shares"""
+        supply = defaultdict(list)
+        demand = defaultdict(list)
+        for source in self.sources:
+            for card_id, count in self.available_counters[source].items():
+                supply[card_id].append((source, count))
+        for target in self.targets:
+            for card_id, count in self.required_counters[target].items():
+                demand[card_id].append((target, count))
+
+        self.supply_left: Dict[Tuple[Collection, str], int] = {}
+        self.demand_left: Dict[Tuple[Collection, str], int] = {}
+        self.supply_budget: Dict[Tuple[int, str], int] = {}
+        self.demand_budget: Dict[Tuple[int, str], int] = {}
+        self.pair_cards: Dict[Tuple[Collection, Collection], List[str]] = defaultdict(
+            list
+        )
+
+        for card_id, card_supply in supply.items():
+            card_demand = demand.get(card_id)
+            if not card_demand:
+                continue
+
+            quantity = min(
+                sum(c for _, c in card_supply), sum(c for _, c in card_demand)
+            )
+            source_tiers = self._tier_budgets(card_supply, quantity)
+            target_tiers = self._tier_budgets(card_demand, quantity)
+            for priority, budget in source_tiers.items():
+                self.supply_budget[(priority, card_id)] = budget
+            for priority, budget in target_tiers.items():
+                self.demand_budget[(priority, card_id)] = budget
+
+            # Collections outside the tiers that carry the flow never take part
+            sources = [(s, c) for s, c in card_supply if s.priority in source_tiers]
+            targets = [(t, c) for t, c in card_demand if t.priority in target_tiers]
+            for source, count in sources:
+                self.supply_left[(source, card_id)] = count
+            for target, count in targets:
+                self.demand_left[(target, card_id)] = count
+            for source, _ in sources:
+                for target, _ in targets:
+                    self.pair_cards[(source, target)].append(card_id)
+
+    def _routable(self, source: Collection, target: Collection, card_id: str) -> int:
+        return min(
+            self.supply_left[(source, card_id)],
+            self.supply_budget[(source.priority, card_id)],
+            self.demand_left[(target, card_id)],
+            self.demand_budget[(target.priority, card_id)],
+        )
+
+    def _pair_volume(self, source: Collection, target: Collection) -> int:
+        return sum(
+            self._routable(source, target, card_id)
+            for card_id in self.pair_cards[(source, target)]
+        )
+
+    def _commit(self, source: Collection, target: Collection) -> Counter:
+        moved = Counter()
+        for card_id in self.pair_cards[(source, target)]:
+            amount = self._routable(source, target, card_id)
+            if amount <= 0:
+                continue
+            moved[card_id] = amount
+            self.supply_left[(source, card_id)] -= amount
+            self.supply_budget[(source.priority, card_id)] -= amount
+            self.demand_left[(target, card_id)] -= amount
+            self.demand_budget[(target.priority, card_id)] -= amount
+        return moved
+
+    def solve(self) -> List[Movement]:
+        self._build_network()
+
+        source_rank = {source: i for i, source in enumerate(self.sources)}
+        target_rank = {target: i for i, target in enumerate(self.targets)}
+
+        def weight(source: Collection, target: Collection) -> int:
+            return (
+                source.priority
+                - self.sources[-1].priority
+                + target.priority
+                - self.targets[-1].priority
+                + 1
+            )
+
+        # Volumes only ever shrink, so a stale heap entry is an upper bound: an
+        # entry that still beats the next best after recomputation is the true max
+        heap = []
+        for source, target in self.pair_cards:
+            volume = self._pair_volume(source, target)
+            if volume > 0:
+                heap.append(
+                    (
+                        -weight(source, target) * volume,
+                        source_rank[source],
+                        target_rank[target],
+                    )
+                )
+        heapq.heapify(heap)
+
+        flows: List[Tuple[Collection, Collection, Counter]] = []
+        while heap:
+            if self.max_moves is not None and len(flows) >= self.max_moves:
+                break
+
+            _, source_index, target_index = heapq.heappop(heap)
+            source = self.sources[source_index]
+            target = self.targets[target_index]
+            volume = self._pair_volume(source, target)
+            if volume <= 0:
+                continue
+            score = weight(source, target) * volume
+            if heap and score < -heap[0][0]:
+                heapq.heappush(heap, (-score, source_index, target_index))
+                continue
+
+            flows.append((source, target, self._commit(source, target)))
+
+        movements = [
+            Movement(
+                source=source,
+                target=target,
+                intersection=sum(card_counts.values()),
+                card_counts=card_counts,
+            )
+            for source, target, card_counts in flows
+        ]
+        movements.sort(
+            key=lambda m: (m.source.priority, m.target.priority, m.intersection),
+            reverse=True,
+        )
+        return movements
@@ -0,0 +1,163 @@
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models import Collection, Movement
+
+# Upper bound on elements materialized at once by np.minimum when scoring blocks
+BLOCK_ELEMENTS = 8_000_000
+
+
+class MatrixScoringEngine:
+    """
+    Vectorized drop-in for PairScoringEngine.
+
+    Card ids shared by at least one source and one target are interned to dense
+    column indices, and the counters become a sources x cards and a
+    targets x cards count matrix, with rows in the stable priority order the
+    greedy scans in. All pairwise intersection sizes are computed at once with
+    np.minimum(...).sum(...); a movement is applied as an in-place subtraction
+    from one source row and one target row, and only that row and column of the
+    intersection matrix are adjusted, using just the columns that moved.
+
+    The best pair is the row-major argmax of a composite integer key
+    (source priority, target priority, intersection), which resolves ties in the
+    same order as the exhaustive scan.
+    """
+
+    def __init__(
+        self,
+        available_counters: Dict[Collection, Counter],
+        required_counters: Dict[Collection, Counter],
+    ):
+        self.sources: List[Collection] = sorted(
+            available_counters, key=lambda c: c.priority, reverse=True
+        )
+        self.targets: List[Collection] = sorted(
+            required_counters, key=lambda c: c.priority, reverse=True
+        )
+        self._source_row = {source: i for i, source in enumerate(self.sources)}
+        self._target_row = {target: i for i, target in enumerate(self.targets)}
+
+        available_ids = set().union(*available_counters.values())
+        required_ids = set().union(*required_counters.values())
+        self.card_ids: List[str] = sorted(available_ids & required_ids)
+        self.card_index: Dict[str, int] = {
+            card_id: i for i, card_id in enumerate(self.card_ids)
+        }
+
+        self.available = self._count_matrix(self.sources, available_counters)
+        self.required = self._count_matrix(self.targets, required_counters)
+
+        # Where each card sits in its source counter, so movements list their
+        # cards in the same order as `Counter & Counter` would
+        self._source_positions = np.zeros_like(self.available)
+        for row, source in enumerate(self.sources):
+            for position, card_id in enumerate(available_counters[source]):
+                column = self.card_index.get(card_id)
+                if column is not None:
+                    self._source_positions[row, column] = position
+        self.intersections = self._pairwise_intersections(self.available, self.required)
+
+        # Pack (source priority, target priority, intersection) into one int64 so
+        # a single argmax ranks pairs; intersections only shrink from here on
+        source_levels = np.unique([s.priority for s in self.sources])
+        target_levels = np.unique([t.priority for t in self.targets])
+        source_rank = np.searchsorted(
+            source_levels, [s.priority for s in self.sources]
+        ).astype(np.int64)
+        target_rank = np.searchsorted(
+            target_levels, [t.priority for t in self.targets]
+        ).astype(np.int64)
+        count_levels = int(self.intersections.max(initial=0)) + 1
+        self._priority_key = (
+            source_rank[:, None] * len(target_levels) + target_rank[None, :]
+        ) * count_levels
+
+    def _count_matrix(
+        self, collections: List[Collection], counters: Dict[Collection, Counter]
+    ) -> np.ndarray:
+        matrix = np.zeros((len(collections), len(self.card_ids)), dtype=np.int32)
+        for row, collection in enumerate(collections):
+            for card_id, count in counters[collection].items():
+                column = self.card_index.get(card_id)
+                if column is not None:
+                    matrix[row, column] = count
+        return matrix
+
+    @staticmethod
+    def _pairwise_intersections(
+        available: np.ndarray, required: np.ndarray
+    ) -> np.ndarray:
+        """intersections[i, j] = sum(min(available[i], required[j])), in row blocks"""
+        intersections = np.zeros(
+            (available.shape[0], required.shape[0]), dtype=np.int64
+        )
+        per_row = max(required.size, 1)
+        block = max(1, BLOCK_ELEMENTS // per_row)
+        for start in range(0, available.shape[0], block):
+            chunk = available[start : start + block]
+            intersections[start : start + block] = np.minimum(
+                chunk[:, None, :], required[None, :, :]
+            ).sum(axis=2)
+        return intersections
+
+    def best_movement(self) -> Optional[Movement]:
+        if self.intersections.size == 0:
+            return None
+
+        scores = np.where(
+            self.intersections > 0, self._priority_key + self.intersections, -1
+        )
+        best = int(np.argmax(scores))
+        source_row, target_row = divmod(best, len(self.targets))
+        if scores[source_row, target_row] < 0:
+            return None
+
+        shared = np.minimum(self.available[source_row], self.required[target_row])
+        columns = np.flatnonzero(shared)
+        columns = columns[np.argsort(self._source_positions[source_row, columns])]
+        card_counts = {
+            self.card_ids[column]: count
+            for column, count in zip(columns.tolist(), shared[columns].tolist())
+        }
+        return Movement(
+            source=self.sources[source_row],
+            target=self.targets[target_row],
+            intersection=sum(card_counts.values()),
+            card_counts=card_counts,
+        )
+
+    def update(self, source: Collection, target: Collection, moved: Counter):
+        source_row = self._source_row[source]
+        target_row = self._target_row[target]
+
+        columns = np.fromiter(
+            (self.card_index[card_id] for card_id in moved), dtype=np.intp
+        )
+        counts = np.fromiter(moved.values(), dtype=np.int32, count=len(moved))
+
+        # Only the moved columns change, so adjust the source row and target
+        # column of the intersection matrix by their delta on those columns
+        available_before = self.available[source_row, columns]
+        required_before = self.required[target_row, columns]
+        available_after = available_before - counts
+        required_after = required_before - counts
+
+        required_columns = self.required[:, columns]
+        self.intersections[source_row, :] += (
+            np.minimum(available_after, required_columns)
+            - np.minimum(available_before, required_columns)
+        ).sum(axis=1)
+        available_columns = self.available[:, columns]
+        self.intersections[:, target_row] += (
+            np.minimum(available_columns, required_after)
+            - np.minimum(available_columns, required_before)
+        ).sum(axis=1)
+
+        self.available[source_row, columns] = available_after
+        self.required[target_row, columns] = required_after
+        self.intersections[source_row, target_row] = np.minimum(
+            self.available[source_row], self.required[target_row]
+        ).sum()
@@ -0,0 +1,161 @@
+import hashlib
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Candidates kept for exact re-ranking, as a multiple of the requested k
+RERANK_FACTOR = 4
+
+
+def _card_hash(card: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(
+        hashlib.blake2b(card.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class MinHashIndex:
+    """
+    Nearest-deck index over card sets: MinHash signatures with banded LSH.
+
+    Each deck gets a `num_perm`-value MinHash signature (multiply-shift hashes
+    of the card names); the signature is cut into `bands` bands, and decks
+    sharing any band bucket become candidates for each other. A query ranks
+    its LSH candidates by the fraction of matching signature values, then
+    re-ranks the best of them by exact Jaccard similarity of the card sets.
+    With fewer than `k` candidates every indexed deck is scanned by signature
+    instead, so a query always returns `k` results when the index has them.
+
+    The default 64 bands of 2 values make decks with a Jaccard similarity of
+    0.3 candidates of each other with 99.8% probability, and decks at 0.05
+    with about 15%. Decks can be added (or replaced) and removed at any time.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 64, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        rng = np.random.default_rng(seed)
+        # Odd multipliers make x -> a * x mod 2**64 a permutation
+        self._a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) * 2 + 1
+        self._b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self._card_hashes: Dict[str, int] = {}
+
+        self._cards: Dict[Hashable, FrozenSet[str]] = {}
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(bands)]
+        # Stacked signatures for full scans, rebuilt after the index changes
+        self._matrix: Optional[Tuple[List[Hashable], np.ndarray]] = None
+
+    @classmethod
+    def from_decks(
+        cls, decks: Dict[Hashable, Iterable[str]], **kwargs
+    ) -> "MinHashIndex":
+        index = cls(**kwargs)
+        for key, cards in decks.items():
+            index.add(key, cards)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._cards
+
+    def signature(self, cards: Iterable[str]) -> np.ndarray:
+        """MinHash signature of a card set (all ones for an empty set)"""
+        hashes = []
+        for card in cards:
+            value = self._card_hashes.get(card)
+            if value is None:
+                value = self._card_hashes[card] = _card_hash(card)
+            hashes.append(value)
+        if not hashes:
+            return np.full(self.num_perm, np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = np.array(hashes, dtype=np.uint64)[:, None]
+        permuted = (values * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [band.tobytes() for band in signature.reshape(self.bands, -1)]
+
+    def add(self, key: Hashable, cards: Iterable[str]):
+        """Index a deck, replacing any deck already stored under `key`"""
+        if key in self._cards:
+            self.remove(key)
+        cards = frozenset(cards)
+        signature = self.signature(cards)
+        self._cards[key] = cards
+        self._signatures[key] = signature
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+        self._matrix = None
+
+    def remove(self, key: Hashable):
+        signature = self._signatures.pop(key)
+        del self._cards[key]
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets[band_key]
+            bucket.discard(key)
+            if not bucket:
+                del buckets[band_key]
+        self._matrix = None
+
+    def _all_signatures(self) -> Tuple[List[Hashable], np.ndarray]:
+        if self._matrix is None:
+            keys = list(self._signatures)
+            signatures = (
+                np.stack([self._signatures[key] for key in keys])
+                if keys
+                else np.empty((0, self.num_perm), dtype=np.uint32)
+            )
+            self._matrix = (keys, signatures)
+        return self._matrix
+
+    def query(
+        self, cards: Iterable[str], k: int = 10, exclude: Optional[Hashable] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        The `k` indexed decks most similar to `cards`
+        :param cards: card names of the deck to match (e.g. your own deck)
+        :param k: number of results
+        :param exclude: key to leave out, e.g. the commander being matched
+        :return: (key, exact Jaccard similarity) pairs, most similar first
+        """
+        cards = frozenset(cards)
+        signature = self.signature(cards)
+
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates |= buckets.get(band_key, set())
+        candidates.discard(exclude)
+
+        if len(candidates) >= k:
+            keys = list(candidates)
+            signatures = np.stack([self._signatures[key] for key in keys])
+        else:
+            keys, signatures = self._all_signatures()
+        estimates = (signatures == signature).mean(axis=1)
+
+        shortlist = RERANK_FACTOR * k + (exclude is not None)
+        if len(keys) > shortlist:
+            best = np.argpartition(-estimates, shortlist - 1)[:shortlist]
+        else:
+            best = range(len(keys))
+
+        results = []
+        for position in best:
+            key = keys[position]
+            if key == exclude:
+                continue
+            other = self._cards[key]
+            union = len(cards | other)
+            results.append((key, len(cards & other) / union if union else 0.0))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+    def query_key(self, key: Hashable, k: int = 10) -> List[Tuple[Hashable, float]]:
+        """The `k` indexed decks most similar to the deck stored under `key`"""
+        return self.query(self._cards[key], k=k, exclude=key)
@@ -1,8 +1,49 @@
-import cloudscraper
-from time import sleep
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, Union
+
+from services.response_cache import CachedResponse, ResponseCache
+from services.retry_policy import retry_policy
+from services.scraper_pool import scraper_pool
+from services.single_flight import SingleFlight
+
+MOXFIELD_API_URL = "https://api2.moxfield.com"
+DECK_PATH = "/v3/decks/all/{id}"
+BINDER_SEARCH_PATH = "/v1/trade-binders/{id}/search"
+# Binder search page sizes to try, largest first; the first one the endpoint
+# accepts is used from then on
+BINDER_PAGE_SIZES = (1000, 500, 250, 100)
+# Upper bound on binder pages requested at once
+MAX_CONCURRENT_PAGES = 8
+
+# Upper bound on simultaneous Moxfield requests made by fetch_many
+MAX_CONCURRENT_FETCHES = 8
+
+# Seconds a deck payload or binder first page is kept after it is fetched, so
+# the reshuffle that follows a name lookup does not download it again
+RECENT_PAYLOAD_TTL = 120.0
+
+# Optional on-disk cache shared by every worker; see ResponseCache.from_env
+response_cache: Optional[ResponseCache] = ResponseCache.from_env()
+
+_single_flight = SingleFlight()
+_recent_payloads: Dict[Hashable, Tuple[float, Any]] = {}
+_recent_payloads_lock = threading.Lock()
+
+
+class FetchRequest(NamedTuple):
+    """One deck or binder to load with MoxfieldConnector.fetch_many"""
+
+    id: str
+    is_binder: bool = False
+    include_sideboard: bool = False
 
 
 class MoxfieldConnector:
+    # Largest binder page size the search endpoint has accepted so far
+    _binder_page_size = BINDER_PAGE_SIZES[0]
 
     @staticmethod
     def _build_headers() -> dict:
@@ -19,113 +60,247 @@ class MoxfieldConnector:
         return [v for k, v in cards.items()]
 
     @staticmethod
-    def get_deck_name(id: str, is_binder: bool = False) -> str:
-        scraper = cloudscraper.create_scraper()
-        retries = 3
+    def _send(
+        url: str, headers: dict, params: Optional[dict] = None
+    ) -> requests.Response:
+        # Pooled sessions keep their connections and Cloudflare clearance; the
+        # shared policy retries transient failures and fails fast while the
+        # host's circuit breaker is open
+        return retry_policy.call(
+            url, lambda: scraper_pool.get(url, headers=headers, params=params)
+        )
 
-        if is_binder:
-            # For binders, use the search endpoint to get tradeBinder object
-            base_url = "https://api2.moxfield.com/v1/trade-binders/{id}/search"
-            params = {
-                "pageNumber": 1,
-                "pageSize": 100,
-                "playStyle": "paperDollars",
-                "sortType": "cardName",
-                "sortDirection": "ascending",
-            }
-            for _ in range(retries):
-                response = scraper.get(
-                    url=base_url.format(id=id),
-                    headers=MoxfieldConnector._build_headers(),
-                    params=params,
-                )
-                if response.status_code == 200:
-                    break
-                sleep(5)  # Wait for 5 seconds before retrying
-            else:
-                raise Exception("Failed to fetch binder name")
+    @staticmethod
+    def _get(url: str, params: Optional[dict] = None) -> requests.Response:
+        if response_cache is None:
+            return MoxfieldConnector._send(
+                url, MoxfieldConnector._build_headers(), params
+            )
 
-            return response.json()["tradeBinder"]["name"]
-        else:
-            # For decks, use the existing endpoint
-            base_url = "https://api2.moxfield.com/v3/decks/all/" + id
-            for _ in range(retries):
-                response = scraper.get(
-                    url=base_url,
-                    headers=MoxfieldConnector._build_headers(),
-                )
-                if response.status_code == 200:
-                    break
-                sleep(5)  # Wait for 5 seconds before retrying
-            else:
-                raise Exception("Failed to fetch deck name")
+        key = requests.Request("GET", url, params=params).prepare().url
+        cached = response_cache.get(key)
+        if cached is not None and cached.fresh:
+            return MoxfieldConnector._cached_response(url, cached)
 
-            return response.json()["name"]
+        headers = MoxfieldConnector._build_headers()
+        if cached is not None:
+            # Ask upstream to answer 304 if the stored body is still current
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
 
-    @staticmethod
-    def get_deck_content(id: str, include_sideboard: bool = False) -> list[dict]:
-        base_url = "https://api2.moxfield.com/v3/decks/all/"
-        scraper = cloudscraper.create_scraper()
-        retries = 3
-        for _ in range(retries):
-            response = scraper.get(
-                url=base_url + id,
-                headers=MoxfieldConnector._build_headers(),
+        response = MoxfieldConnector._send(url, headers, params)
+        if response.status_code == 304 and cached is not None:
+            response_cache.refresh(key)
+            return MoxfieldConnector._cached_response(url, cached)
+        if response.status_code == 200:
+            response_cache.put(
+                key,
+                response.content,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
             )
-            if response.status_code == 200:
-                break
-            sleep(5)  # Wait for 5 seconds before retrying
-        else:
-            raise Exception("Failed to fetch deck content")
+        return response
+
+    @staticmethod
+    def _cached_response(url: str, cached: CachedResponse) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = cached.body
+        return response
+
+    @staticmethod
+    def _binder_params(
+        page_number: int, page_size: int = BINDER_PAGE_SIZES[-1]
+    ) -> dict:
+        return {
+            "pageNumber": page_number,
+            "pageSize": page_size,
+            "playStyle": "paperDollars",
+            "sortType": "cardName",
+            "sortDirection": "ascending",
+        }
+
+    @staticmethod
+    def _parse_deck_cards(deck: dict, include_sideboard: bool = False) -> list[dict]:
+        """Flatten a deck payload into its mainboard, commander and companion cards"""
+        boards = deck["boards"]
+        mainboard = MoxfieldConnector._unpack_response(boards["mainboard"]["cards"])
+        commanders = MoxfieldConnector._unpack_response(boards["commanders"]["cards"])
+        companions = MoxfieldConnector._unpack_response(boards["companions"]["cards"])
 
-        mainboard = MoxfieldConnector._unpack_response(
-            response.json()["boards"]["mainboard"]["cards"]
-        )
-        commanders = MoxfieldConnector._unpack_response(
-            response.json()["boards"]["commanders"]["cards"]
-        )
-        companions = MoxfieldConnector._unpack_response(
-            response.json()["boards"]["companions"]["cards"]
-        )
-        
         cards = mainboard + commanders + companions
-        
+
         if include_sideboard:
-            sideboard = MoxfieldConnector._unpack_response(
-                response.json()["boards"]["sideboard"]["cards"]
-            )
+            sideboard = MoxfieldConnector._unpack_response(boards["sideboard"]["cards"])
             cards = cards + sideboard
 
         return cards
 
+    @staticmethod
+    def _recent(key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """
+        Payload for `key` if it was fetched in the last RECENT_PAYLOAD_TTL seconds,
+        otherwise fetch it, with concurrent callers sharing one upstream request
+        """
+        now = monotonic()
+        with _recent_payloads_lock:
+            for stale in [k for k, (t, _) in _recent_payloads.items() if t <= now]:
+                del _recent_payloads[stale]
+            if key in _recent_payloads:
+                return _recent_payloads[key][1]
+
+        def fetch_and_keep():
+            payload = fetch()
+            with _recent_payloads_lock:
+                _recent_payloads[key] = (monotonic() + RECENT_PAYLOAD_TTL, payload)
+            return payload
+
+        return _single_flight.do(key, fetch_and_keep)
+
+    @staticmethod
+    def clear_recent_payloads():
+        """Forget kept deck payloads and binder pages so the next call refetches"""
+        with _recent_payloads_lock:
+            _recent_payloads.clear()
+
+    @staticmethod
+    def _fetch_deck(id: str) -> dict:
+        response = MoxfieldConnector._get(MOXFIELD_API_URL + DECK_PATH.format(id=id))
+        if response.status_code != 200:
+            raise Exception("Failed to fetch deck")
+        return response.json()
+
+    @staticmethod
+    def _get_deck(id: str) -> dict:
+        return MoxfieldConnector._recent(
+            ("deck", id), lambda: MoxfieldConnector._fetch_deck(id)
+        )
+
+    @staticmethod
+    def get_deck_name(id: str, is_binder: bool = False) -> str:
+        if is_binder:
+            # For binders, the search endpoint's first page holds the tradeBinder
+            # object; keeping it also saves get_binder_content a request
+            first_page, _ = MoxfieldConnector._get_first_binder_page(id)
+            return first_page["tradeBinder"]["name"]
+        else:
+            # The full deck payload is kept for the get_deck_content that follows
+            return MoxfieldConnector._get_deck(id)["name"]
+
+    @staticmethod
+    def get_deck_content(id: str, include_sideboard: bool = False) -> list[dict]:
+        return MoxfieldConnector._parse_deck_cards(
+            MoxfieldConnector._get_deck(id), include_sideboard
+        )
+
+    @staticmethod
+    def _get_binder_page(url: str, page_number: int, page_size: int) -> dict:
+        response = MoxfieldConnector._get(
+            url, params=MoxfieldConnector._binder_params(page_number, page_size)
+        )
+        if response.status_code != 200:
+            raise Exception("Failed to fetch binder content")
+        return response.json()
+
+    @staticmethod
+    def _fetch_first_binder_page(url: str) -> tuple[dict, int]:
+        """
+        First page of a binder at the largest page size the endpoint accepts
+        :return: the page and the page size it was fetched with
+        """
+        for page_size in BINDER_PAGE_SIZES:
+            if page_size > MoxfieldConnector._binder_page_size:
+                continue
+            response = MoxfieldConnector._get(
+                url, params=MoxfieldConnector._binder_params(1, page_size)
+            )
+            if response.status_code == 200:
+                MoxfieldConnector._binder_page_size = page_size
+                return response.json(), page_size
+            # Only a rejected page size is worth retrying smaller
+            if response.status_code != 400:
+                break
+        raise Exception("Failed to fetch binder content")
+
+    @staticmethod
+    def _get_first_binder_page(id: str) -> tuple[dict, int]:
+        url = MOXFIELD_API_URL + BINDER_SEARCH_PATH.format(id=id)
+        return MoxfieldConnector._recent(
+            ("binder", id), lambda: MoxfieldConnector._fetch_first_binder_page(url)
+        )
+
     @staticmethod
     def get_binder_content(id: str) -> list[dict]:
-        cards = []
-        pageNumber = 1
-        base_url = "https://api2.moxfield.com/v1/trade-binders/{id}/search"
-        params = {
-            "pageNumber": pageNumber,
-            "pageSize": 100,
-            "playStyle": "paperDollars",
-            "sortType": "cardName",
-            "sortDirection": "ascending",
-        }
-        scraper = cloudscraper.create_scraper()
+        # Concurrent loads of the same binder share one set of page requests
+        return _single_flight.do(
+            ("binder-content", id),
+            lambda: MoxfieldConnector._fetch_binder_content(id),
+        )
+
+    @staticmethod
+    def _fetch_binder_content(id: str) -> list[dict]:
+        url = MOXFIELD_API_URL + BINDER_SEARCH_PATH.format(id=id)
+        first_page, page_size = MoxfieldConnector._get_first_binder_page(id)
+        pages = [first_page]
+
+        # totalPages is known up front, so the rest can be fetched side by side;
+        # map yields them back in page order
+        total_pages = first_page["totalPages"]
+        if total_pages > 1 and first_page["data"]:
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_CONCURRENT_PAGES, total_pages - 1)
+            ) as executor:
+                pages.extend(
+                    executor.map(
+                        lambda page_number: MoxfieldConnector._get_binder_page(
+                            url, page_number, page_size
+                        ),
+                        range(2, total_pages + 1),
+                    )
+                )
+
+        return [card for page in pages for card in page["data"]]
+
+    def fetch_many(
+        self,
+        requests: list[FetchRequest],
+        max_workers: int = MAX_CONCURRENT_FETCHES,
+        return_exceptions: bool = False,
+    ) -> list[Union[list[dict], Exception]]:
+        """
+        Fetch several decks and binders concurrently
+        :param requests: decks and binders to load
+        :param max_workers: maximum number of requests in flight at once
+        :param return_exceptions: put a failed fetch's exception in its slot
+            instead of raising it
+        :return: card lists in the same order as `requests`
+        """
 
-        while True:
-            response = scraper.get(
-                url=base_url.format(id=id),
-                headers=MoxfieldConnector._build_headers(),
-                params=params,
+        def fetch(fetch_request: FetchRequest) -> list[dict]:
+            if fetch_request.is_binder:
+                return self.get_binder_content(fetch_request.id)
+            return self.get_deck_content(
+                fetch_request.id, fetch_request.include_sideboard
             )
-            if response.status_code != 200:
-                raise Exception("Failed to fetch binder content")
 
-            new_cards = response.json()["data"]
-            cards.extend(new_cards)
+        if not requests:
+            return []
 
-            if response.json()["totalPages"] == pageNumber or not new_cards:
-                break
-            pageNumber += 1
-            params["pageNumber"] = pageNumber
-        return cards
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(requests))
+        ) as executor:
+            futures = [executor.submit(fetch, r) for r in requests]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        for pending in futures:
+                            pending.cancel()
+                        raise
+                    results.append(e)
+        return results
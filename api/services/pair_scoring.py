@@ -0,0 +1,157 @@
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import Collection, Movement
+
+
+class PairScoringEngine:
+    """
+    Tracks the best source -> target movement without rescoring every pair.
+
+    An inverted index uniqueCardId -> {sources, targets} limits scoring to pairs
+    that share at least one card, and after each movement only the pairs that
+    touch the moved source or target are adjusted. Candidates sit in a lazy heap
+    keyed on (source priority, target priority, intersection) whose tie-breaks
+    follow the greedy scan order, so the chosen movements are exactly the ones
+    the exhaustive search would pick.
+
+    The counters are shared with the caller, which is expected to decrement them
+    before calling `update` with the cards it moved.
+    """
+
+    def __init__(
+        self,
+        available_counters: Dict[Collection, Counter],
+        required_counters: Dict[Collection, Counter],
+    ):
+        self.available_counters = available_counters
+        self.required_counters = required_counters
+
+        # Stable sorts reproduce the order the exhaustive search iterates in
+        self.sources: List[Collection] = sorted(
+            available_counters, key=lambda c: c.priority, reverse=True
+        )
+        self.targets: List[Collection] = sorted(
+            required_counters, key=lambda c: c.priority, reverse=True
+        )
+        self._source_rank = {source: i for i, source in enumerate(self.sources)}
+        self._target_rank = {target: i for i, target in enumerate(self.targets)}
+
+        self.sources_by_card: Dict[str, Set[Collection]] = defaultdict(set)
+        self.targets_by_card: Dict[str, Set[Collection]] = defaultdict(set)
+        for source, counter in available_counters.items():
+            for card_id in counter:
+                self.sources_by_card[card_id].add(source)
+        for target, counter in required_counters.items():
+            for card_id in counter:
+                self.targets_by_card[card_id].add(target)
+
+        self.pair_scores: Dict[Tuple[Collection, Collection], int] = {}
+        self._heap: List[Tuple[int, int, int, int, int]] = []
+        self._score_all_pairs()
+
+    def _score_all_pairs(self):
+        scores: Dict[Tuple[Collection, Collection], int] = defaultdict(int)
+        for card_id, sources in self.sources_by_card.items():
+            targets = self.targets_by_card.get(card_id)
+            if not targets:
+                continue
+            for source in sources:
+                available = self.available_counters[source][card_id]
+                for target in targets:
+                    scores[(source, target)] += min(
+                        available, self.required_counters[target][card_id]
+                    )
+
+        for (source, target), score in scores.items():
+            self._set_score(source, target, score)
+
+    def _set_score(self, source: Collection, target: Collection, score: int):
+        self.pair_scores[(source, target)] = score
+        if score > 0:
+            heapq.heappush(
+                self._heap,
+                (
+                    -source.priority,
+                    -target.priority,
+                    -score,
+                    self._source_rank[source],
+                    self._target_rank[target],
+                ),
+            )
+
+    def best_movement(self) -> Optional[Movement]:
+        """Pop stale heap entries until the top one matches its current score"""
+        while self._heap:
+            _, _, negative_score, source_rank, target_rank = self._heap[0]
+            source = self.sources[source_rank]
+            target = self.targets[target_rank]
+            if self.pair_scores.get((source, target)) != -negative_score:
+                heapq.heappop(self._heap)
+                continue
+
+            source_counter = self.available_counters.get(source, Counter())
+            target_counter = self.required_counters.get(target, Counter())
+            intersection = source_counter & target_counter
+            return Movement(
+                source=source,
+                target=target,
+                intersection=sum(intersection.values()),
+                card_counts=intersection,
+            )
+        return None
+
+    def update(self, source: Collection, target: Collection, moved: Counter):
+        """
+        Adjust the scores of pairs touching `source` or `target` after `moved`
+        copies were taken out of both.
+        """
+        source_counter = self.available_counters.get(source, Counter())
+        target_counter = self.required_counters.get(target, Counter())
+        deltas: Dict[Tuple[Collection, Collection], int] = defaultdict(int)
+
+        for card_id, count in moved.items():
+            available_after = source_counter[card_id]
+            available_before = available_after + count
+            required_after = target_counter[card_id]
+            required_before = required_after + count
+
+            for other_target in self.targets_by_card.get(card_id, ()):
+                if other_target == target:
+                    continue
+                required = self.required_counters[other_target][card_id]
+                deltas[(source, other_target)] += min(available_after, required) - min(
+                    available_before, required
+                )
+
+            for other_source in self.sources_by_card.get(card_id, ()):
+                if other_source == source:
+                    continue
+                available = self.available_counters[other_source][card_id]
+                deltas[(other_source, target)] += min(available, required_after) - min(
+                    available, required_before
+                )
+
+            if available_after == 0:
+                self.sources_by_card[card_id].discard(source)
+            if required_after == 0:
+                self.targets_by_card[card_id].discard(target)
+
+        for (pair_source, pair_target), delta in deltas.items():
+            if delta:
+                self._set_score(
+                    pair_source,
+                    pair_target,
+                    self.pair_scores[(pair_source, pair_target)] + delta,
+                )
+
+        if len(target_counter) < len(source_counter):
+            smaller, larger = target_counter, source_counter
+        else:
+            smaller, larger = source_counter, target_counter
+        self._set_score(
+            source,
+            target,
+            sum(min(count, larger[card_id]) for card_id, count in smaller.items()),
+        )
@@ -0,0 +1,137 @@
+import os
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: buckets are still shared between threads
+    fcntl = None
+
+
+class HostLimit(NamedTuple):
+    # Sustained requests per second the host tolerates
+    rate: float
+    # Requests allowed back to back after an idle period
+    burst: int
+
+
+# Ceilings per upstream host; hosts not listed here are not rate limited
+HOST_LIMITS: Dict[str, HostLimit] = {
+    "api2.moxfield.com": HostLimit(rate=10.0, burst=16),
+    "edhrec.com": HostLimit(rate=10.0, burst=10),
+    "json.edhrec.com": HostLimit(rate=10.0, burst=10),
+}
+
+# After a 429 the rate is halved, down to this fraction of the ceiling; each
+# accepted request then adds this fraction of the ceiling back
+MIN_RATE_FRACTION = 0.05
+RECOVERY_FRACTION = 0.02
+
+# tokens, last refill time, current rate
+_STATE = struct.Struct("<ddd")
+
+
+class RateLimiter:
+    """
+    Token bucket per upstream host, shared by every thread and process that
+    points at the same `directory`.
+
+    Each host's bucket lives in a small file that is locked for the few
+    microseconds it takes to refill and take a token, so gunicorn workers
+    and their threads draw from one budget instead of one each. Taking a
+    token never blocks: `reserve` may drive the bucket negative and returns
+    how long the caller has to wait for its turn, which lets blocking code
+    sleep and asyncio code await.
+
+    The refill rate adapts between MIN_RATE_FRACTION of the host ceiling and
+    the ceiling itself: `throttled` halves it when the host answers 429 and
+    `accepted` grows it back a little with every successful request.
+    """
+
+    def __init__(self, directory: str = None, limits: Dict[str, HostLimit] = None):
+        self.directory = Path(
+            directory
+            or os.environ.get("RATE_LIMIT_DIR")
+            or Path(tempfile.gettempdir()) / "edhremixer-rate-limits"
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.limits = HOST_LIMITS if limits is None else limits
+        self._lock = threading.Lock()
+        # Rate each bucket had when this process last touched it
+        self._rates: Dict[str, float] = {}
+
+    def _update(self, host: str, change) -> float:
+        """Apply `change(tokens, rate, limit) -> (tokens, rate, result)` under the lock"""
+        limit = self.limits[host]
+        with self._lock, open(self.directory / f"{host}.bucket", "a+b") as file:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            file.seek(0)
+            raw = file.read(_STATE.size)
+            now = time.time()
+            if len(raw) == _STATE.size:
+                tokens, updated_at, rate = _STATE.unpack(raw)
+                tokens = min(limit.burst, tokens + max(0.0, now - updated_at) * rate)
+            else:
+                tokens, rate = float(limit.burst), limit.rate
+
+            tokens, rate, result = change(tokens, rate, limit)
+
+            file.seek(0)
+            file.truncate()
+            file.write(_STATE.pack(tokens, now, rate))
+            file.flush()
+            self._rates[host] = rate
+        return result
+
+    def reserve(self, host: str) -> float:
+        """Take a token for one request to `host`; returns the seconds to wait first"""
+        if host not in self.limits:
+            return 0.0
+
+        def take(tokens, rate, limit):
+            tokens -= 1
+            return tokens, rate, max(0.0, -tokens / rate)
+
+        return self._update(host, take)
+
+    def acquire(self, host: str):
+        """Block until a request to `host` may be sent"""
+        wait = self.reserve(host)
+        if wait:
+            time.sleep(wait)
+
+    def throttled(self, host: str):
+        """The host answered 429: halve the rate"""
+        if host not in self.limits:
+            return
+        self._update(
+            host,
+            lambda tokens, rate, limit: (
+                tokens,
+                max(limit.rate * MIN_RATE_FRACTION, rate / 2),
+                None,
+            ),
+        )
+
+    def accepted(self, host: str):
+        """The host served a request: creep the rate back towards its ceiling"""
+        # Nothing to recover while the bucket is known to be at full rate
+        if host not in self.limits or self._rates.get(host) == self.limits[host].rate:
+            return
+        self._update(
+            host,
+            lambda tokens, rate, limit: (
+                tokens,
+                min(limit.rate, rate + limit.rate * RECOVERY_FRACTION),
+                None,
+            ),
+        )
+
+
+# Shared by the Moxfield and EDHREC clients through the retry policy
+rate_limiter = RateLimiter()
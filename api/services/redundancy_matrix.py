@@ -0,0 +1,133 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+import numpy as np
+
+from services.deck_similarity import jaccard_rows
+
+
+class RedundancyMatrix:
+    """
+    Pairwise Jaccard similarity of commanders' card sets, kept up to date
+    incrementally and persisted to a local .npz file.
+
+    `update` only computes the rows and columns of the commanders that are
+    new or whose card set changed, against every stored commander; `remove`
+    drops rows and columns. The card sets are stored with the matrix, so
+    unchanged commanders never need their decks again.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.commanders: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._cards: List[FrozenSet[str]] = []
+        self.similarity = np.zeros((0, 0), dtype=np.float64)
+
+    @classmethod
+    def load(cls, path: str) -> "RedundancyMatrix":
+        """Matrix stored at `path`, or an empty one saved there later"""
+        matrix = cls(path)
+        if not Path(path).exists():
+            return matrix
+        with np.load(path) as data:
+            matrix.commanders = data["commanders"].tolist()
+            matrix.similarity = data["similarity"]
+            names = data["card_names"].tolist()
+            offsets = data["card_offsets"].tolist()
+        matrix._cards = [
+            frozenset(names[start:stop]) for start, stop in zip(offsets, offsets[1:])
+        ]
+        matrix._row = {name: row for row, name in enumerate(matrix.commanders)}
+        return matrix
+
+    def save(self, path: Optional[str] = None):
+        """Write the matrix and card sets atomically to `path` (default: loaded path)"""
+        path = Path(path or self.path)
+        offsets = np.cumsum([0] + [len(cards) for cards in self._cards])
+        directory = path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            np.savez(
+                file,
+                commanders=np.array(self.commanders, dtype=str),
+                similarity=self.similarity,
+                card_names=np.array(
+                    [card for cards in self._cards for card in sorted(cards)],
+                    dtype=str,
+                ),
+                card_offsets=offsets,
+            )
+        os.replace(file.name, path)
+
+    def __len__(self) -> int:
+        return len(self.commanders)
+
+    def __contains__(self, commander: str) -> bool:
+        return commander in self._row
+
+    def cards(self, commander: str) -> FrozenSet[str]:
+        return self._cards[self._row[commander]]
+
+    def update(self, decks: Dict[str, Set[str]]) -> List[str]:
+        """
+        Add new commanders and refresh those whose card set changed
+        :param decks: card set per commander
+        :return: commanders whose row and column were (re)computed
+        """
+        changed = [
+            commander
+            for commander, cards in decks.items()
+            if commander not in self._row or self.cards(commander) != frozenset(cards)
+        ]
+        if not changed:
+            return []
+
+        for commander in changed:
+            cards = frozenset(decks[commander])
+            if commander in self._row:
+                self._cards[self._row[commander]] = cards
+            else:
+                self._row[commander] = len(self.commanders)
+                self.commanders.append(commander)
+                self._cards.append(cards)
+
+        n = len(self.commanders)
+        if self.similarity.shape[0] < n:
+            grown = np.zeros((n, n), dtype=np.float64)
+            old = self.similarity.shape[0]
+            grown[:old, :old] = self.similarity
+            self.similarity = grown
+
+        rows = [self._row[commander] for commander in changed]
+        block = jaccard_rows([self._cards[row] for row in rows], self._cards)
+        self.similarity[rows, :] = block
+        self.similarity[:, rows] = block.T
+        self.similarity[rows, rows] = 1.0
+        return changed
+
+    def remove(self, commanders: Iterable[str]):
+        rows = sorted({self._row[commander] for commander in commanders})
+        self.similarity = np.delete(
+            np.delete(self.similarity, rows, axis=0), rows, axis=1
+        )
+        removed = set(rows)
+        self.commanders = [
+            c for row, c in enumerate(self.commanders) if row not in removed
+        ]
+        self._cards = [c for row, c in enumerate(self._cards) if row not in removed]
+        self._row = {name: row for row, name in enumerate(self.commanders)}
+
+    def submatrix(self, commanders: List[str]) -> np.ndarray:
+        """
+        Similarities among `commanders`, in that order; commanders not in the
+        matrix get a 0 row and column (1 on the diagonal)
+        """
+        result = np.zeros((len(commanders), len(commanders)), dtype=np.float64)
+        known = [i for i, commander in enumerate(commanders) if commander in self._row]
+        rows = [self._row[commanders[i]] for i in known]
+        result[np.ix_(known, known)] = self.similarity[np.ix_(rows, rows)]
+        np.fill_diagonal(result, 1.0)
+        return result
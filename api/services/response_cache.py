@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+# Defaults used when the cache is configured through the environment
+DEFAULT_TTL = 10 * 60.0
+DEFAULT_MAX_MB = 256
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Stored less than `ttl` seconds ago: usable without asking upstream
+    fresh: bool
+    # Seconds since the entry was stored (or last refreshed)
+    age: float = 0.0
+
+
+class ResponseCache:
+    """
+    HTTP response bodies persisted in a SQLite file.
+
+    Every thread gets its own connection and the database runs in WAL mode, so
+    the threads of one process and separate processes (e.g. gunicorn workers)
+    can all read and write the same file. Entries older than `ttl` are not
+    dropped: they keep their ETag / Last-Modified validators so the caller can
+    revalidate them with a conditional request and `refresh` them on a 304.
+    Once the stored bodies exceed `max_bytes`, the least recently read entries
+    are evicted.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_TTL, max_bytes: int = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes or DEFAULT_MAX_MB * 1024 * 1024
+        self._local = threading.local()
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at
+                ON responses (accessed_at);
+            """)
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """
+        Cache configured by MOXFIELD_CACHE_PATH (unset disables caching),
+        MOXFIELD_CACHE_TTL in seconds and MOXFIELD_CACHE_MAX_MB
+        """
+        path = os.environ.get("MOXFIELD_CACHE_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            ttl=float(os.environ.get("MOXFIELD_CACHE_TTL", DEFAULT_TTL)),
+            max_bytes=int(os.environ.get("MOXFIELD_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            * 1024
+            * 1024,
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        connection.execute(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        body, etag, last_modified, stored_at = row
+        age = now - stored_at
+        return CachedResponse(body, etag, last_modified, age < self.ttl, age)
+
+    def put(
+        self,
+        key: str,
+        body: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        now = time.time()
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, body, etag, last_modified, now, now, len(body)),
+        )
+        self._evict(connection)
+
+    def refresh(self, key: str):
+        """Restart the TTL of an entry upstream confirmed unchanged"""
+        now = time.time()
+        self._connection().execute(
+            "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+            (now, now, key),
+        )
+
+    def _evict(self, connection: sqlite3.Connection):
+        (total,) = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM responses")
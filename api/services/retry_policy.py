@@ -0,0 +1,209 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from urllib.parse import urlsplit
+
+import requests
+
+from services.rate_limiter import RateLimiter, rate_limiter as shared_rate_limiter
+
+# Answers worth another attempt; anything else (404 in particular) is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+Response = TypeVar("Response")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive failed calls to a host its circuit
+    opens and calls fail immediately with CircuitOpenError. Once
+    `reset_timeout` seconds have passed a single trial call is let through:
+    success closes the circuit, failure keeps it open for another timeout.
+    A trial that ends any other way (cancelled, or an error that says nothing
+    about the host) is released so the next call can try again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._trial_running: Dict[str, bool] = {}
+
+    def before_call(self, host: str) -> bool:
+        """
+        :return: whether this call is the half-open trial, which the caller
+            must `release_trial` once it is over
+        :raises CircuitOpenError: the host's circuit is open
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return False
+            if (
+                time.monotonic() - opened_at < self.reset_timeout
+                or self._trial_running.get(host)
+            ):
+                raise CircuitOpenError(f"{host} is unavailable, not retrying for now")
+            self._trial_running[host] = True
+            return True
+
+    def release_trial(self, host: str):
+        """End a trial call without an outcome; a no-op once one was recorded"""
+        with self._lock:
+            self._trial_running.pop(host, None)
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._trial_running.pop(host, None)
+
+    def record_failure(self, host: str):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+            if (
+                self._trial_running.pop(host, False)
+                or self._failures[host] >= self.failure_threshold
+            ):
+                self._opened_at[host] = time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Retries transient upstream failures with exponential backoff and full
+    jitter, waiting for `Retry-After` instead when the upstream sends one, and
+    consults a per-host CircuitBreaker before every attempt.
+
+    Connection errors and RETRY_STATUSES answers are retried up to
+    `max_attempts` in total; the last such answer is returned to the caller as
+    is, so existing status checks keep working. Only these count as host
+    failures for the circuit breaker; any other exception is passed through.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 10.0,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+
+    @staticmethod
+    def _retry_after(headers) -> Optional[float]:
+        value = headers.get("Retry-After") if headers is not None else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def delay(self, attempt: int, headers=None) -> float:
+        """Seconds to wait after failed attempt number `attempt` (from 0)"""
+        retry_after = self._retry_after(headers)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    @staticmethod
+    def _status(response) -> int:
+        # requests uses status_code, aiohttp uses status
+        return getattr(response, "status_code", None) or response.status
+
+    def _record_answer(self, host: str, status: int):
+        """Feed an upstream answer to the circuit breaker and rate limiter"""
+        if status in RETRY_STATUSES:
+            self.circuit_breaker.record_failure(host)
+        else:
+            self.circuit_breaker.record_success(host)
+        if self.rate_limiter is not None:
+            if status == 429:
+                self.rate_limiter.throttled(host)
+            elif status not in RETRY_STATUSES:
+                self.rate_limiter.accepted(host)
+
+    def call(self, url: str, send: Callable[[], Response]) -> Response:
+        """
+        Run `send` (one GET of `url`) under the policy
+        :raises CircuitOpenError: the host's circuit is open
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_attempts):
+            trial = self.circuit_breaker.before_call(host)
+            last_attempt = attempt + 1 == self.max_attempts
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire(host)
+                response = send()
+                status = self._status(response)
+                self._record_answer(host, status)
+            except requests.RequestException:
+                self.circuit_breaker.record_failure(host)
+                if last_attempt:
+                    raise
+                time.sleep(self.delay(attempt))
+                continue
+            finally:
+                if trial:
+                    self.circuit_breaker.release_trial(host)
+
+            if status not in RETRY_STATUSES or last_attempt:
+                return response
+            time.sleep(self.delay(attempt, response.headers))
+
+    async def call_async(
+        self, url: str, send: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """Same as `call` for a coroutine function, sleeping without blocking"""
+        # Imported here so the blocking code paths do not need aiohttp
+        import aiohttp
+
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_attempts):
+            trial = self.circuit_breaker.before_call(host)
+            last_attempt = attempt + 1 == self.max_attempts
+            try:
+                if self.rate_limiter is not None:
+                    await asyncio.sleep(self.rate_limiter.reserve(host))
+                response = await send()
+                status = self._status(response)
+                self._record_answer(host, status)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.circuit_breaker.record_failure(host)
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self.delay(attempt))
+                continue
+            finally:
+                if trial:
+                    self.circuit_breaker.release_trial(host)
+
+            if status not in RETRY_STATUSES or last_attempt:
+                return response
+            await asyncio.sleep(self.delay(attempt, response.headers))
+
+
+# Shared by the Moxfield and EDHREC clients, so one breaker and one token
+# bucket track each host
+retry_policy = RetryPolicy(rate_limiter=shared_rate_limiter)
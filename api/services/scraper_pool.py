@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import cloudscraper
+import requests
+
+# Sessions kept per process; each holds its own keep-alive connections and
+# Cloudflare clearance cookies
+MAX_SESSIONS = 8
+# Concurrent requests allowed against a single host across all sessions
+MAX_REQUESTS_PER_HOST = 8
+# Idle sessions older than this are closed instead of reused
+IDLE_TIMEOUT = 120.0
+# Sessions are recycled after this long even when busy, so clearance is renewed
+MAX_SESSION_AGE = 30 * 60.0
+# Answers that mean the session lost its clearance or connection is unusable.
+# 429 is not one: the host is asking for fewer requests, which the retry
+# policy and rate limiter handle, and the session's clearance is still good
+UNHEALTHY_STATUSES = {403, 503}
+
+
+class _PooledSession:
+    def __init__(self, session: requests.Session):
+        self.session = session
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ScraperPool:
+    """
+    Thread-safe pool of reusable cloudscraper sessions.
+
+    A request leases an idle session (creating one while fewer than
+    `max_sessions` exist, otherwise waiting for one to come back), so the TCP
+    and TLS handshakes and the Cloudflare challenge are paid once per session
+    rather than once per request. Sessions idle for longer than `idle_timeout`
+    or older than `max_age` are closed when next encountered, and a session
+    whose request raised or came back with a challenge/ban status is discarded
+    so the next lease renegotiates from scratch. Requests to one host are
+    additionally capped at `max_per_host` in flight.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = MAX_SESSIONS,
+        max_per_host: int = MAX_REQUESTS_PER_HOST,
+        idle_timeout: float = IDLE_TIMEOUT,
+        max_age: float = MAX_SESSION_AGE,
+        factory: Callable[[], requests.Session] = cloudscraper.create_scraper,
+    ):
+        self.max_sessions = max_sessions
+        self.max_per_host = max_per_host
+        self.idle_timeout = idle_timeout
+        self.max_age = max_age
+        self.factory = factory
+
+        self._idle: List[_PooledSession] = []
+        self._open = 0
+        self._condition = threading.Condition()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _is_fresh(self, pooled: _PooledSession, now: float) -> bool:
+        return (
+            now - pooled.last_used <= self.idle_timeout
+            and now - pooled.created_at <= self.max_age
+        )
+
+    def _acquire(self) -> _PooledSession:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                # Most recently used first: the warmest connections
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if self._is_fresh(pooled, now):
+                        return pooled
+                    self._close(pooled)
+                if self._open < self.max_sessions:
+                    self._open += 1
+                    break
+                self._condition.wait()
+
+        try:
+            return _PooledSession(self.factory())
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, pooled: _PooledSession, healthy: bool):
+        with self._condition:
+            if healthy and self._is_fresh(pooled, time.monotonic()):
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            else:
+                self._close(pooled)
+            self._condition.notify()
+
+    def _close(self, pooled: _PooledSession):
+        """Caller holds the condition lock"""
+        self._open -= 1
+        pooled.session.close()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._condition:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_slots[host]
+
+    def get(
+        self, url: str, headers: Optional[dict] = None, params: Optional[dict] = None
+    ) -> requests.Response:
+        """GET `url` on a pooled session"""
+        with self._host_slot(url):
+            pooled = self._acquire()
+            healthy = False
+            try:
+                response = pooled.session.get(url=url, headers=headers, params=params)
+                healthy = response.status_code not in UNHEALTHY_STATUSES
+                return response
+            finally:
+                self._release(pooled, healthy)
+
+    def clear(self):
+        """Close every idle session"""
+        with self._condition:
+            while self._idle:
+                self._close(self._idle.pop())
+            self._condition.notify_all()
+
+
+# Shared by every MoxfieldConnector call in the process
+scraper_pool = ScraperPool()
@@ -1,11 +1,31 @@
-from typing import List, ByteString, Dict, Set
+from typing import List, ByteString, Dict, Set, Tuple, Optional, BinaryIO
 from models import Collection, Card, Movement
-from services.moxfield_connector import MoxfieldConnector
-from services.edhrec import get_card_overall_inclusion
+from services.moxfield_connector import MoxfieldConnector, FetchRequest
+from services.pair_scoring import PairScoringEngine
+from services.flow_allocator import FlowAllocator
+from services.matrix_scoring import MatrixScoringEngine
+from services.edhrec import get_cards_overall_inclusion
 from collections import Counter, defaultdict
-import pandas as pd
+import xlsxwriter
 from io import BytesIO
-from concurrent.futures import ThreadPoolExecutor, as_completed
+
+EXPORT_COLUMNS = [
+    "uniqueCardId",
+    "name",
+    "source",
+    "target",
+    "type_line",
+    "color_identity",
+    "price_usd",
+    "basic_land",
+    "reshuffled",
+    "ditched",
+    "buylist",
+]
+
+# Seconds an export with the inclusion column waits for EDHREC; cards not
+# resolved by then are left blank
+INCLUSION_TIMEOUT = 30.0
 
 
 class ShuffleManager:
@@ -20,261 +40,299 @@ class ShuffleManager:
     def _handle_card_extractions(self, inputs, moxfield_connector) -> None:
         # Filter out inactive collections
         active_inputs = [input for input in inputs if input.active]
+        self.collections: List[Collection] = active_inputs
 
-        cards = []
-        for input in active_inputs:
-            if input.is_deck:
-                deck_cards = moxfield_connector.get_deck_content(
-                    input.moxfield_id, input.include_sideboard
-                )
-            else:
-                deck_cards = moxfield_connector.get_binder_content(input.moxfield_id)
-            for card in deck_cards:
-                for _ in range(card["quantity"]):
-                    cards.append(
-                        Card(
-                            source=input if input.is_source else None,
-                            target=input if not input.is_source else None,
-                            price_usd=card["card"].get("prices").get("usd", 0),
-                            **card["card"],
-                        )
-                    )
-
-        self.initially_available_cards = [
-            card for card in cards if card.source is not None
-        ]
-        self.initially_required_cards = [card for card in cards if card.source is None]
-        self.available_cards = self.initially_available_cards.copy()
-        self.required_cards = self.initially_required_cards.copy()
-        self.allocated_cards = []
-
-        # Build indexes for fast lookups
-        self._build_indexes()
-
-    def _build_indexes(self):
-        """Build indexes for O(1) lookups instead of O(n) filters"""
-        self.available_by_source: Dict[Collection, List[Card]] = defaultdict(list)
-        self.required_by_target: Dict[Collection, List[Card]] = defaultdict(list)
-
-        for card in self.available_cards:
-            if card.source:
-                self.available_by_source[card.source].append(card)
+        # One validated Card per uniqueCardId, shared by every copy in every
+        # collection; collections only hold counts
+        self.card_details: Dict[str, Card] = {}
+        self.available_counters: Dict[Collection, Counter] = defaultdict(Counter)
+        self.required_counters: Dict[Collection, Counter] = defaultdict(Counter)
 
-        for card in self.required_cards:
-            if card.target:
-                self.required_by_target[card.target].append(card)
-
-        # Pre-compute Counters for each collection
-        self.available_counters: Dict[Collection, Counter] = {}
-        self.required_counters: Dict[Collection, Counter] = {}
-
-        for source, cards in self.available_by_source.items():
-            self.available_counters[source] = Counter([c.uniqueCardId for c in cards])
-
-        for target, cards in self.required_by_target.items():
-            self.required_counters[target] = Counter([c.uniqueCardId for c in cards])
-
-    def _find_intersection(self, deck_1: List[Card], deck_2: List[Card]) -> List[str]:
-        """
-        This method compares two decks and returns the number of similar cards between them
-        :param deck1: list of cards
-        :param deck2: list of cards
-        :return: int - number of similar cards
-        """
-        deck1_cards = Counter([c.uniqueCardId for c in deck_1])
-        deck2_cards = Counter([c.uniqueCardId for c in deck_2])
-        intersection = (deck1_cards & deck2_cards).elements()
-        result = list(intersection)
-        return result
-
-    def _find_intersection_fast(
-        self, source: Collection, target: Collection
-    ) -> List[str]:
-        """Fast intersection using pre-computed Counters"""
-        source_counter = self.available_counters.get(source, Counter())
-        target_counter = self.required_counters.get(target, Counter())
-        intersection = (source_counter & target_counter).elements()
-        return list(intersection)
-
-    def _find_optimal_movement(
-        self, available_cards: List[Card], required_cards: List[Card]
-    ):
-        # Use pre-built indexes instead of filtering
-        source_collections = list(self.available_by_source.keys())
-        target_collections = list(self.required_by_target.keys())
-
-        # Sort sources by priority (highest first)
-        source_collections.sort(key=lambda c: c.priority, reverse=True)
-        # Sort targets by priority (highest first)
-        target_collections.sort(key=lambda c: c.priority, reverse=True)
-
-        best_movement = None
-        best_score = (
-            -float("inf"),
-            -float("inf"),
-            -float("inf"),
-        )  # (source_priority, target_priority, intersection_count)
-
-        # Iterate through all combinations to find the best one
-        for source_collection in source_collections:
-            for target_collection in target_collections:
-                # Use fast intersection with pre-computed Counters
-                intersection = self._find_intersection_fast(
-                    source_collection, target_collection
+        # Fetched concurrently; results come back in input order
+        contents = moxfield_connector.fetch_many(
+            [
+                FetchRequest(
+                    id=input.moxfield_id,
+                    is_binder=not input.is_deck,
+                    include_sideboard=input.include_sideboard,
                 )
-                intersection_count = len(intersection)
-
-                # Skip combinations with no matches
-                if intersection_count == 0:
+                for input in active_inputs
+            ]
+        )
+        for input, deck_cards in zip(active_inputs, contents):
+            counters = (
+                self.available_counters if input.is_source else self.required_counters
+            )
+            for card in deck_cards:
+                if card["quantity"] <= 0:
                     continue
+                card_id = card["card"]["uniqueCardId"]
+                if card_id not in self.card_details:
+                    self.card_details[card_id] = Card(
+                        source=None,
+                        target=None,
+                        price_usd=card["card"].get("prices").get("usd", 0),
+                        **card["card"],
+                    )
+                counters[input][card_id] += card["quantity"]
 
-                # Score: higher priority and higher intersection count is better
-                current_score = (
-                    source_collection.priority,
-                    target_collection.priority,
-                    intersection_count,
-                )
+        self.initially_available_count = sum(
+            sum(counter.values()) for counter in self.available_counters.values()
+        )
+        self.initially_required_count = sum(
+            sum(counter.values()) for counter in self.required_counters.values()
+        )
+        # (source, target) -> copies of each uniqueCardId moved between them
+        self.allocations: Dict[Tuple[Collection, Collection], Counter] = defaultdict(
+            Counter
+        )
 
-                # If this is better than our best, update
-                if current_score > best_score:
-                    best_score = current_score
-                    best_movement = Movement(
-                        source=source_collection,
-                        target=target_collection,
-                        intersection=intersection_count,
-                        intersection_cards=intersection,
-                    )
+    @property
+    def allocated_count(self) -> int:
+        return sum(sum(counter.values()) for counter in self.allocations.values())
 
-        return best_movement
+    def _find_optimal_movement(self):
+        # Highest (source priority, target priority, intersection) pair, served
+        # incrementally by the scoring engine instead of a full rescan
+        return self._scoring.best_movement()
 
     def _validate_shuffling(self):
-        assert len(self.initially_available_cards) == (
-            len(self.available_cards) + len(self.allocated_cards)
+        remaining_available = sum(
+            sum(counter.values()) for counter in self.available_counters.values()
+        )
+        remaining_required = sum(
+            sum(counter.values()) for counter in self.required_counters.values()
         )
-        assert len(self.initially_required_cards) == (
-            len(self.required_cards) + len(self.allocated_cards)
+        assert self.initially_available_count == (
+            remaining_available + self.allocated_count
+        )
+        assert self.initially_required_count == (
+            remaining_required + self.allocated_count
         )
 
     def _update_indexes_after_movement(
-        self, source: Collection, target: Collection, card_ids: List[str]
+        self, source: Collection, target: Collection, cards_to_remove: Counter
     ):
         """Update indexes after moving cards - more efficient than rebuilding"""
-        # Count how many of each card_id to remove (respects duplicates in the list)
-        cards_to_remove = Counter(card_ids)
-
-        # Update available_by_source
-        if source in self.available_by_source:
-            remaining_cards = []
-            for card in self.available_by_source[source]:
-                # Only remove if we still have cards of this ID to remove
-                if cards_to_remove[card.uniqueCardId] > 0:
-                    cards_to_remove[card.uniqueCardId] -= 1
-                else:
-                    remaining_cards.append(card)
-
-            self.available_by_source[source] = remaining_cards
-            if not self.available_by_source[source]:
-                del self.available_by_source[source]
-                del self.available_counters[source]
-            else:
-                # Update counter
-                self.available_counters[source] = Counter(
-                    [c.uniqueCardId for c in self.available_by_source[source]]
-                )
+        self._decrement_counter(self.available_counters, source, cards_to_remove)
+        self._decrement_counter(self.required_counters, target, cards_to_remove)
 
-        # Reset counter for required_by_target removal
-        cards_to_remove = Counter(card_ids)
-
-        # Update required_by_target
-        if target in self.required_by_target:
-            remaining_cards = []
-            for card in self.required_by_target[target]:
-                # Only remove if we still have cards of this ID to remove
-                if cards_to_remove[card.uniqueCardId] > 0:
-                    cards_to_remove[card.uniqueCardId] -= 1
-                else:
-                    remaining_cards.append(card)
-
-            self.required_by_target[target] = remaining_cards
-            if not self.required_by_target[target]:
-                del self.required_by_target[target]
-                del self.required_counters[target]
-            else:
-                # Update counter
-                self.required_counters[target] = Counter(
-                    [c.uniqueCardId for c in self.required_by_target[target]]
-                )
-
-    def reshuffle(self):
-        while True:
-            if not self.available_cards or not self.required_cards:
-                break
-            best_movement = self._find_optimal_movement(
-                self.available_cards, self.required_cards
-            )
+    @staticmethod
+    def _decrement_counter(
+        counters: Dict[Collection, Counter], collection: Collection, removed: Counter
+    ):
+        counter = counters[collection]
+        for card_id, count in removed.items():
+            counter[card_id] -= count
+            if counter[card_id] <= 0:
+                del counter[card_id]
+        if not counter:
+            del counters[collection]
+
+    def _apply_movement(self, movement: Movement) -> Counter:
+        """
+        Move the copies counted in movement.card_counts from the source counts
+        to the target
+        :return: copies of each card id that were actually moved
+        """
+        source_counter = self.available_counters.get(movement.source, Counter())
+        target_counter = self.required_counters.get(movement.target, Counter())
+
+        moved = Counter()
+        for card_id, count in movement.card_counts.items():
+            quantity = min(count, source_counter[card_id], target_counter[card_id])
+            if quantity > 0:
+                moved[card_id] = quantity
+
+        if moved:
+            self.allocations[(movement.source, movement.target)].update(moved)
+            self._update_indexes_after_movement(movement.source, movement.target, moved)
+        return moved
+
+    def _allocate_greedy(self, engine_class=PairScoringEngine) -> List[Movement]:
+        movements = []
+        self._scoring = engine_class(self.available_counters, self.required_counters)
+        while self.available_counters and self.required_counters:
+            best_movement = self._find_optimal_movement()
             if not best_movement or best_movement.intersection == 0:
                 break
 
-            # intersection_cards is a list where each element represents ONE card to move
-            # (Counter intersection already handles quantities correctly)
-            cards_moved = []
-
-            for card_id in best_movement.intersection_cards:
-                # Find ONE available card with this ID from the source
-                available_card = next(
-                    (
-                        card
-                        for card in self.available_cards
-                        if card.uniqueCardId == card_id
-                        and card.source == best_movement.source
-                    ),
-                    None,
-                )
-                # Find ONE required card with this ID from the target
-                required_card = next(
-                    (
-                        card
-                        for card in self.required_cards
-                        if card.uniqueCardId == card_id
-                        and card.target == best_movement.target
-                    ),
-                    None,
-                )
-
-                if available_card and required_card:
-                    self.available_cards.remove(available_card)
-                    self.required_cards.remove(required_card)
-                    available_card.target = best_movement.target
-                    self.allocated_cards.append(available_card)
-                    cards_moved.append(card_id)
-
             # Update indexes incrementally with only the cards actually moved
-            if cards_moved:
-                self._update_indexes_after_movement(
-                    best_movement.source, best_movement.target, cards_moved
-                )
+            moved = self._apply_movement(best_movement)
+            if moved:
+                self._scoring.update(best_movement.source, best_movement.target, moved)
+                movements.append(best_movement)
+
+        return movements
+
+    def _allocate_flow(self, max_moves: Optional[int]) -> List[Movement]:
+        movements = FlowAllocator(
+            self.available_counters, self.required_counters, max_moves=max_moves
+        ).solve()
+        for movement in movements:
+            self._apply_movement(movement)
+        return movements
+
+    def allocate(
+        self, mode: str = "greedy", max_moves: Optional[int] = None
+    ) -> List[Movement]:
+        """
+        Move cards from sources to targets
+        :param mode: "greedy" commits the best source/target intersection one at a
+            time; "matrix" runs the same greedy on NumPy count matrices (identical
+            movements, faster with hundreds of collections); "flow" solves the
+            whole allocation as a min-cost flow in one pass
+        :param max_moves: cap on distinct source -> target movements ("flow" only)
+        :return: list of movements in the order they were applied
+        """
+        if mode == "greedy":
+            movements = self._allocate_greedy()
+        elif mode == "matrix":
+            movements = self._allocate_greedy(MatrixScoringEngine)
+        elif mode == "flow":
+            movements = self._allocate_flow(max_moves)
+        else:
+            raise ValueError(f"Unknown allocation mode: {mode}")
 
         self._validate_shuffling()
-        return self._build_excel_file()
+        return movements
 
-    def _build_excel_file(self) -> ByteString:
-        cards = self.allocated_cards + self.required_cards + self.available_cards
-        cards.sort(key=lambda x: x.name)
-
-        # Build DataFrame
-        df = pd.DataFrame(
-            [
+    def summarize(self) -> List[dict]:
+        """
+        Per-collection totals computed from the allocation counts alone
+        :return: one entry per active collection with the copies it gives or
+            receives (reshuffled), the copies left in a source (ditched) and the
+            copies still missing from a target (buylist)
+        """
+        reshuffled = Counter()
+        for (source, target), counter in self.allocations.items():
+            moved = sum(counter.values())
+            reshuffled[source] += moved
+            reshuffled[target] += moved
+
+        summary = []
+        for collection in self.collections:
+            summary.append(
                 {
-                    **card.model_dump(),
-                    "source": card.source.name if card.source is not None else None,
-                    "target": card.target.name if card.target is not None else None,
+                    "id": collection.id,
+                    "name": collection.name,
+                    "is_source": collection.is_source,
+                    "reshuffled": reshuffled[collection],
+                    "ditched": sum(
+                        self.available_counters.get(collection, Counter()).values()
+                    ),
+                    "buylist": sum(
+                        self.required_counters.get(collection, Counter()).values()
+                    ),
                 }
-                for card in cards
-            ]
+            )
+        return summary
+
+    def reshuffle(
+        self,
+        mode: str = "greedy",
+        max_moves: Optional[int] = None,
+        aggregate: bool = False,
+        inclusion: bool = False,
+    ):
+        self.allocate(mode=mode, max_moves=max_moves)
+        return self._build_excel_file(aggregate=aggregate, inclusion=inclusion)
+
+    def _export_groups(
+        self,
+    ) -> List[Tuple[Card, Optional[Collection], Optional[Collection], int]]:
+        """(card, source, target, copies) for every distinct row, sorted by name"""
+        groups = [
+            (self.card_details[card_id], source, target, count)
+            for (source, target), counter in self.allocations.items()
+            for card_id, count in counter.items()
+        ]
+        groups += [
+            (self.card_details[card_id], None, target, count)
+            for target, counter in self.required_counters.items()
+            for card_id, count in counter.items()
+        ]
+        groups += [
+            (self.card_details[card_id], source, None, count)
+            for source, counter in self.available_counters.items()
+            for card_id, count in counter.items()
+        ]
+        groups.sort(key=lambda group: group[0].name)
+        return groups
+
+    def write_excel_file(
+        self,
+        output: BinaryIO,
+        aggregate: bool = False,
+        inclusion: bool = False,
+        inclusion_timeout: float = INCLUSION_TIMEOUT,
+    ) -> None:
+        """
+        Stream the allocation to an xlsx file without building per-copy objects
+        :param output: writable binary file object
+        :param aggregate: write one row per (card, source, target) with a quantity
+            column instead of one row per copy
+        :param inclusion: add an edhrec_inclusion column with each card's overall
+            EDHREC inclusion percentage, fetched in one batch
+        :param inclusion_timeout: seconds to spend on that batch; cards still
+            unresolved afterwards are left blank
+        """
+        columns = (
+            EXPORT_COLUMNS
+            + (["edhrec_inclusion"] if inclusion else [])
+            + (["quantity"] if aggregate else [])
         )
+        groups = self._export_groups()
+        if inclusion:
+            inclusions = get_cards_overall_inclusion(
+                {card.name for card, _, _, _ in groups}, timeout=inclusion_timeout
+            )
 
+        # constant_memory flushes each row as soon as the next one starts; card
+        # names are plain text, so skip the url and formula detection on strings
+        workbook = xlsxwriter.Workbook(
+            output,
+            {
+                "constant_memory": True,
+                "strings_to_urls": False,
+                "strings_to_formulas": False,
+            },
+        )
+        worksheet = workbook.add_worksheet("Sheet1")
+        header_format = workbook.add_format({"bold": True, "border": 1})
+        worksheet.write_row(0, 1, columns, header_format)
+
+        row = 1
+        for card, source, target, count in groups:
+            values = [
+                card.uniqueCardId,
+                card.name,
+                source.name if source is not None else None,
+                target.name if target is not None else None,
+                card.type_line,
+                str(card.color_identity),
+                card.price_usd,
+                card.basic_land,
+                source is not None and target is not None,
+                source is not None and target is None,
+                source is None and target is not None,
+            ]
+            if inclusion:
+                data = inclusions.get(card.name)
+                values.append(data["inclusion_percentage"] if data else None)
+            if aggregate:
+                worksheet.write_row(row, 0, [row - 1, *values, count])
+                row += 1
+                continue
+            for _ in range(count):
+                worksheet.write_row(row, 0, [row - 1, *values])
+                row += 1
+
+        workbook.close()
+
+    def _build_excel_file(
+        self, aggregate: bool = False, inclusion: bool = False
+    ) -> ByteString:
         with BytesIO() as buffer:
-            with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:  # type: ignore
-                df.to_excel(writer, sheet_name="Sheet1")
-                writer.close()  # This will save the content to the buffer
+            self.write_excel_file(buffer, aggregate=aggregate, inclusion=inclusion)
             return buffer.getvalue()  # Returns the Excel file in memory